@@ -1,4 +1,5 @@
-from typing import Annotated
+from datetime import datetime
+from typing import Annotated, Literal
 import logging
 
 from fastapi import (
@@ -7,22 +8,42 @@ from fastapi import (
     HTTPException,
     status,
     Header,
+    Query,
+    Request,
     Response,
     WebSocket,
     WebSocketDisconnect,
 )
+from fastapi.responses import StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from app.config import settings
 from app.database import get_db_dependency
 from app.models import (
     PollCreate,
     PollCreatedResponse,
     PollPublic,
     PollResults,
+    PollSummaryPage,
+    PollVoteHistory,
+    PollVotesInDB,
     VoteCreate,
     VoteSuccessResponse,
+    VoteBatchCreate,
+    VoteBatchResponse,
+)
+from app.services import (
+    create_poll,
+    get_poll_metadata,
+    get_poll_votes,
+    list_creator_polls,
+    get_vote_history,
+    export_poll_results,
+    EXPORT_FORMATS,
+    add_vote,
+    add_votes_batch,
+    delete_poll,
 )
-from app.services import create_poll, get_poll_by_id, add_vote, delete_poll
 from app.exceptions import (
     PollAccessDeniedError,
     PollCreationError,
@@ -30,8 +51,20 @@ from app.exceptions import (
     PollClosedError,
     AlreadyVotedError,
     InvalidOptionsError,
+    ConnectionLimitError,
+    InvalidCursorError,
+    VoteBufferFullError,
 )
 
+from app.serialization import (
+    JSONBytesResponse,
+    encode_poll_public,
+    encode_poll_results,
+    etag_matches,
+    poll_cache_headers,
+)
+from app.services.rate_limit import limit_poll_creation, limit_vote_batches, limit_votes
+from app.sse import EventStreamConnection, parse_event_id
 from app.websocket_manager import manager
 
 logger = logging.getLogger(__name__)
@@ -39,15 +72,41 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+async def _refresh_new_stream(
+    poll_id: str, current: PollVotesInDB | None, db: AsyncIOMotorDatabase
+):
+    """
+    Re-read a poll's counts once its first client on this worker is registered.
+    Updates published between the first read and the stream existing reached no one,
+    so without this the client would only catch up with the next vote.
+    """
+
+    if current is None:
+        return
+    latest = await get_poll_votes(poll_id, db)
+    if latest is not None and latest.seq > current.seq:
+        await manager.refresh(poll_id, latest)
+
+
 @router.post(
     "/polls",
     response_model=PollCreatedResponse,
     status_code=status.HTTP_201_CREATED,
     summary="Create a new poll",
-    responses={500: {"description": "Internal server error during poll creation"}},
+    dependencies=[Depends(limit_poll_creation)],
+    responses={
+        429: {"description": "Too many polls created, retry after `Retry-After` seconds"},
+        500: {"description": "Internal server error during poll creation"},
+    },
 )
 async def create_poll_endpoint(
-    poll_data: PollCreate, db: AsyncIOMotorDatabase = Depends(get_db_dependency)
+    poll_data: PollCreate,
+    # Optional, reusing a key lists the creator's polls together (see `GET /polls`)
+    creator_key: Annotated[
+        str | None,
+        Header(alias="X-Creator-Key", min_length=32, max_length=128, pattern=r"^[\w-]+$"),
+    ] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db_dependency),
 ):
     """
     Handles the creation of a new poll.
@@ -56,10 +115,11 @@ async def create_poll_endpoint(
     - Validates the data using the `PollCreate` model.
     - Calls the `create_poll` to perform the creation logic.
     - Returns the new poll's ID and a secret creator key.
+      The key of an `X-Creator-Key` header is used instead of a new one, if given.
     """
 
     try:
-        new_poll = await create_poll(poll_data, db)
+        new_poll = await create_poll(poll_data, db, creator_key=creator_key)
         return PollCreatedResponse(
             poll_id=new_poll.poll_id,
             creator_key=new_poll.creator_key,
@@ -77,26 +137,69 @@ async def create_poll_endpoint(
         )
 
 
+@router.get(
+    "/polls",
+    response_model=PollSummaryPage,
+    summary="List the polls of a creator",
+    responses={400: {"description": "The pagination cursor is invalid"}},
+)
+async def list_polls_endpoint(
+    creator_key: Annotated[str, Header(alias="X-Creator-Key")],
+    limit: Annotated[
+        int, Query(ge=1, le=settings.POLL_LIST_MAX_PAGE_SIZE)
+    ] = settings.POLL_LIST_PAGE_SIZE,
+    cursor: str | None = None,  # Query Parameter
+    db: AsyncIOMotorDatabase = Depends(get_db_dependency),
+):
+    """
+    Lists the polls created with the `X-Creator-Key` header's key, newest first.
+    Each entry has the poll's summary and its total number of votes.
+
+    Pages hold up to `limit` polls. If there are more, pass the
+    response's `next_cursor` as `cursor` to get the next page.
+    """
+
+    try:
+        return await list_creator_polls(creator_key, db, limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @router.get(
     "/polls/{poll_id}",
     response_model=PollPublic,
     summary="Get public poll data for voting",
-    responses={404: {"description": "Poll with the specified ID was not found"}},
+    responses={
+        304: {"description": "The poll matches the ETag in `If-None-Match`"},
+        404: {"description": "Poll with the specified ID was not found"},
+    },
 )
 async def get_poll_for_voting_endpoint(
-    poll_id: str, db: AsyncIOMotorDatabase = Depends(get_db_dependency)
+    poll_id: str,
+    if_none_match: Annotated[str | None, Header()] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db_dependency),
 ):
     """
     Fetches the public data for a poll, allowing users to vote.
     Does not include results or other metadata.
+
+    The data never changes, so it is sent with an ETag and can be cached.
+    A matching `If-None-Match` header gets an empty 304 response.
     """
 
-    poll = await get_poll_by_id(poll_id, db)
+    poll = await get_poll_metadata(poll_id, db)
     if not poll:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Poll not found :("
         )
-    return poll
+
+    # Served from the metadata cache when possible, so a 304 usually needs no database read
+    headers = poll_cache_headers(poll)
+    if if_none_match and etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    # Already encoded, skipping the response model's validation and serialization
+    return JSONBytesResponse(encode_poll_public(poll), headers=headers)
 
 
 @router.get(
@@ -120,7 +223,7 @@ async def get_poll_results_endpoint(
     a valid `X-Creator-Key` header must be provided.
     """
 
-    poll = await get_poll_by_id(poll_id, db)
+    poll = await get_poll_metadata(poll_id, db)
     if not poll:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Poll not found :("
@@ -134,18 +237,210 @@ async def get_poll_results_endpoint(
                 detail="You do not have permission to view these results.",
             )
 
-    return poll
+    # Only the vote counts change, so they are the only thing read every time
+    poll_votes = await get_poll_votes(poll_id, db)
+    if not poll_votes:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Poll not found :("
+        )
+
+    return JSONBytesResponse(encode_poll_results(poll, poll_votes.votes))
+
+
+@router.get(
+    "/polls/{poll_id}/results/history",
+    response_model=PollVoteHistory,
+    summary="Get poll votes over time",
+    responses={
+        404: {"description": "Poll with the specified ID was not found"},
+        403: {"description": "Permission denied to view results for a private poll"},
+    },
+)
+async def get_poll_vote_history_endpoint(
+    poll_id: str,
+    start: datetime | None = None,  # Query Parameter
+    end: datetime | None = None,  # Query Parameter
+    creator_key: Annotated[str | None, Header(alias="X-Creator-Key")] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db_dependency),
+):
+    """
+    Fetches the votes per option cast in each time bucket between `start` and `end`,
+    oldest first, for charting results over time. Both bounds are optional.
+    Responses hold a limited number of buckets, pass `next_start` as `start` to get more.
+
+    If the poll's results are not set to be public,
+    a valid `X-Creator-Key` header must be provided.
+    """
+
+    poll = await get_poll_metadata(poll_id, db)
+    if not poll:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Poll not found :("
+        )
+
+    # Check for authorization if results are not public
+    if not poll.public_results:
+        if not creator_key or creator_key != poll.creator_key:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You do not have permission to view these results.",
+            )
+
+    return await get_vote_history(poll_id, db, start, end)
+
+
+@router.get(
+    "/polls/{poll_id}/export",
+    response_class=StreamingResponse,
+    summary="Export poll results as CSV or NDJSON",
+    responses={
+        200: {"content": {"text/csv": {}, "application/x-ndjson": {}}},
+        404: {"description": "Poll with the specified ID was not found"},
+        403: {"description": "Permission denied. The provided X-Creator-Key is invalid or missing."},
+    },
+)
+async def export_poll_results_endpoint(
+    poll_id: str,
+    creator_key: Annotated[str, Header(alias="X-Creator-Key")],
+    export_format: Annotated[Literal["csv", "ndjson"], Query(alias="format")] = "csv",
+    db: AsyncIOMotorDatabase = Depends(get_db_dependency),
+):
+    """
+    Downloads the results of a poll, requires a valid `X-Creator-Key` header.
+
+    Rows have a `type`, `start`, `option_id`, `option` and `votes`. The `total` rows
+    come first, then the `bucket` rows of the votes over time, oldest first.
+    The export is streamed as it is read, so it works the same for very large polls.
+    """
+
+    poll = await get_poll_metadata(poll_id, db)
+    if not poll:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Poll not found :("
+        )
+
+    # Exports are for the creator only, even when the results are public
+    if creator_key != poll.creator_key:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have permission to export these results.",
+        )
+
+    media_type, _ = EXPORT_FORMATS[export_format]
+    return StreamingResponse(
+        export_poll_results(poll, export_format, db),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{poll_id}-results.{export_format}"'
+        },
+    )
+
+
+@router.get(
+    "/polls/{poll_id}/results/stream",
+    response_class=StreamingResponse,
+    summary="Stream live poll results as Server-Sent Events",
+    responses={
+        200: {"content": {"text/event-stream": {}}},
+        404: {"description": "Poll with the specified ID was not found"},
+        403: {"description": "Permission denied to view results for a private poll"},
+        503: {"description": "Too many live results connections, retry later"},
+    },
+)
+async def stream_poll_results_endpoint(
+    request: Request,
+    poll_id: str,
+    creator_key: str | None = None,  # Query Parameter, EventSource can't send headers
+    since: int | None = None,  # Query Parameter
+    last_event_id: Annotated[str | None, Header()] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db_dependency),
+):
+    """
+    Receive-only alternative to the results WebSocket, fed by the same fan-out.
+
+    Sends the same `snapshot` and `delta` messages as events of those names,
+    with the sequence number as the event ID. Browsers resume automatically
+    with `Last-Event-ID`, `since` does the same for a fresh connection.
+    A `Last-Event-ID` that isn't a sequence number gets a snapshot.
+    For private polls, a `creator_key` query parameter must be provided.
+    """
+
+    client_key = request.client.host if request.client else None
+    try:
+        # Refuse before doing any work, `connect` checks again
+        manager.check_admission(poll_id, client_key)
+    except ConnectionLimitError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "30"},
+        )
+
+    poll = await get_poll_metadata(poll_id, db)
+    if not poll:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Poll not found :("
+        )
+
+    if not poll.public_results:
+        if not creator_key or creator_key != poll.creator_key:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You do not have permission to view these results.",
+            )
+
+    current = None
+    if not manager.is_streaming(poll_id):
+        current = await get_poll_votes(poll_id, db)
+
+    connection = EventStreamConnection()
+    try:
+        await manager.connect(
+            poll_id,
+            connection,
+            since=parse_event_id(last_event_id) if last_event_id is not None else since,
+            current=current,
+            client_key=client_key,
+        )
+    except ConnectionLimitError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "30"},
+        )
+    try:
+        await _refresh_new_stream(poll_id, current, db)
+    except Exception:
+        manager.disconnect(poll_id, connection)
+        raise
+
+    async def events():
+        try:
+            async for event in connection.events():
+                yield event
+        finally:
+            # Runs when the client goes away too, as the response is cancelled
+            manager.disconnect(poll_id, connection)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post(
     "/polls/{poll_id}/vote",
     response_model=VoteSuccessResponse,
     summary="Cast a vote on a poll",
+    dependencies=[Depends(limit_votes)],
     responses={
         400: {"description": "Invalid options provided in the vote"},
         403: {"description": "Voting on this poll has closed"},
         404: {"description": "Poll with the specified ID was not found"},
         409: {"description": "This browser has already voted on this poll"},
+        429: {"description": "Too many votes, retry after `Retry-After` seconds"},
+        503: {"description": "Buffered votes can't be written right now, retry later"},
     },
 )
 async def cast_vote_endpoint(
@@ -169,6 +464,53 @@ async def cast_vote_endpoint(
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except InvalidOptionsError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except VoteBufferFullError as e:
+        # Write-behind mode only, the buffered votes aren't getting written
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"},
+        )
+
+
+@router.post(
+    "/polls/{poll_id}/votes/batch",
+    response_model=VoteBatchResponse,
+    summary="Cast many votes on a poll at once",
+    dependencies=[Depends(limit_vote_batches)],
+    responses={
+        403: {"description": "Voting has closed, or no valid creator or API key was given"},
+        404: {"description": "Poll with the specified ID was not found"},
+        429: {"description": "Too many batches, retry after `Retry-After` seconds"},
+    },
+)
+async def cast_vote_batch_endpoint(
+    poll_id: str,
+    batch_data: VoteBatchCreate,
+    creator_key: Annotated[str | None, Header(alias="X-Creator-Key")] = None,
+    api_key: Annotated[str | None, Header(alias="X-API-Key")] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db_dependency),
+):
+    """
+    Submits many votes for a given poll with a single Turnstile token.
+    Each entry is validated on its own, the response lists the status of every entry.
+
+    Requires the poll's `X-Creator-Key`, or an integrator's `X-API-Key`.
+    """
+
+    try:
+        results = await add_votes_batch(poll_id, batch_data, db, creator_key, api_key)
+    except PollAccessDeniedError as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    except PollNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except PollClosedError as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+
+    return VoteBatchResponse(
+        accepted=sum(1 for result in results if result.status == "accepted"),
+        results=results,
+    )
 
 
 @router.delete(
@@ -206,15 +548,31 @@ async def websocket_endpoint(
     websocket: WebSocket,
     poll_id: str,
     creator_key: str | None = None,  # Query Parameter
+    since: int | None = None,  # Query Parameter
     db: AsyncIOMotorDatabase = Depends(get_db_dependency),
 ):
     """
     WebSocket endpoint for broadcasting poll result updates.
     For private polls, a `creator_key` query parameter must be provided.
+
+    Clients first get a `snapshot` of the vote counts, then `delta` messages with the
+    new counts of only the options that changed. Every message carries the poll's
+    sequence number `seq`, and deltas the sequence number `prev` they build on.
+    Reconnecting with `since` set to the last seen `seq` only sends what was missed.
+
+    Connections over the worker, poll or client limits are closed with code 1013.
     """
 
+    client_key = websocket.client.host if websocket.client else None
+    try:
+        # Refuse before doing any work, `connect` checks again
+        manager.check_admission(poll_id, client_key)
+    except ConnectionLimitError as e:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason=str(e))
+        return
+
     # Check if the poll exists
-    poll = await get_poll_by_id(poll_id, db)
+    poll = await get_poll_metadata(poll_id, db)
     if not poll:
         await websocket.close(
             code=status.WS_1008_POLICY_VIOLATION, reason="Poll not found :("
@@ -229,12 +587,26 @@ async def websocket_endpoint(
             )
             return
 
-    await manager.connect(poll_id, websocket)
+    # Clients of the same poll on this worker already have the counts to share
+    current = None
+    if not manager.is_streaming(poll_id):
+        current = await get_poll_votes(poll_id, db)
+
+    try:
+        await manager.connect(
+            poll_id, websocket, since=since, current=current, client_key=client_key
+        )
+    except ConnectionLimitError as e:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason=str(e))
+        return
     logger.info(f"Client connected to WebSocket for poll '{poll_id}'")
 
     try:
+        await _refresh_new_stream(poll_id, current, db)
         while True:
             await websocket.receive_text()
     except WebSocketDisconnect:
-        manager.disconnect(poll_id, websocket)
         logger.info(f"Client disconnected from WebSocket for poll '{poll_id}'")
+    finally:
+        # Also covers clients the manager already evicted
+        manager.disconnect(poll_id, websocket)
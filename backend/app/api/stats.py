@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.database import get_db_dependency
+from app.models import GlobalStats
+from app.services.stats import stats_aggregator
+
+router = APIRouter()
+
+
+@router.get(
+    "/stats",
+    response_model=GlobalStats,
+    summary="Get global totals",
+)
+async def get_global_stats_endpoint(
+    db: AsyncIOMotorDatabase = Depends(get_db_dependency),
+):
+    """
+    Returns the total number of polls created and votes cast.
+    Totals are cached briefly and don't include increments still buffered by workers.
+    """
+
+    return GlobalStats(**await stats_aggregator.get_totals(db))
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.config import settings
+from app.database import get_database
+
+logger = logging.getLogger(__name__)
+
+# Signature of the callback that delivers an encoded message to this worker's sockets
+BroadcastHandler = Callable[[str, bytes], Awaitable[None]]
+
+
+class Backplane(ABC):
+    """Base class for the pub/sub layer sitting underneath `manager.broadcast`.
+
+       - `publish` is called once per update by whichever worker handled it,
+         with the message already JSON-encoded so no worker encodes it again
+       - Every worker (including the publisher) gets the message through the handler
+         and fans it out only to its own local sockets
+    """
+
+    def __init__(self):
+        self._handler: BroadcastHandler | None = None
+
+    def set_handler(self, handler: BroadcastHandler):
+        """Register the callback that receives every published message."""
+
+        self._handler = handler
+
+    async def start(self):
+        """Start receiving messages. No-op by default."""
+
+    async def stop(self):
+        """Stop receiving messages. No-op by default."""
+
+    @abstractmethod
+    async def publish(self, poll_id: str, data: bytes):
+        """Send an encoded message to the handlers of every worker."""
+
+    async def _deliver(self, poll_id: str, data: bytes):
+        """Hand a received message to the handler, never letting errors escape."""
+
+        if self._handler is None:
+            return
+        try:
+            await self._handler(poll_id, data)
+        except Exception:
+            logger.error(f"Failed to deliver broadcast for poll '{poll_id}'", exc_info=True)
+
+
+class InProcessBackplane(Backplane):
+    """Delivers messages directly to the local handler. Only correct for a single worker."""
+
+    async def publish(self, poll_id: str, data: bytes):
+        await self._deliver(poll_id, data)
+
+
+class MongoChangeStreamBackplane(Backplane):
+    """Backplane built on a MongoDB change stream, so no extra infrastructure is needed.
+
+       - `publish` inserts one small document into the `broadcasts` collection
+       - Every worker watches that collection and delivers each inserted message
+       - Old documents are removed by a TTL index, the collection is only a relay
+
+       Change streams require a replica set (MongoDB Atlas always provides one).
+    """
+
+    COLLECTION = "broadcasts"
+    RETENTION_SECONDS = 60
+    RETRY_DELAY_SECONDS = 1
+    # The resume token is no longer in the oplog, or can't be resumed from
+    LOST_RESUME_ERRORS = (
+        260,  # InvalidResumeToken
+        286,  # ChangeStreamHistoryLost
+    )
+
+    def __init__(self):
+        super().__init__()
+        self._task: asyncio.Task | None = None
+        self._resume_token = None
+
+    async def start(self):
+        collection = get_database()[self.COLLECTION]
+        await collection.create_index("created_at", expireAfterSeconds=self.RETENTION_SECONDS)
+        self._task = asyncio.create_task(self._watch())
+        logger.info("MongoDB change stream backplane started.")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def publish(self, poll_id: str, data: bytes):
+        await get_database()[self.COLLECTION].insert_one(
+            {
+                "poll_id": poll_id,
+                "data": data,  # Stored as BSON binary
+                "created_at": datetime.now(timezone.utc),
+            }
+        )
+
+    async def _watch(self):
+        """Follow inserts on the relay collection, resuming after transient errors."""
+
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        while True:
+            try:
+                collection = get_database()[self.COLLECTION]
+                async with collection.watch(
+                    pipeline, resume_after=self._resume_token
+                ) as stream:
+                    async for change in stream:
+                        self._resume_token = stream.resume_token
+                        document = change["fullDocument"]
+                        await self._deliver(document["poll_id"], document["data"])
+            except PyMongoError as e:
+                if isinstance(e, OperationFailure) and e.code in self.LOST_RESUME_ERRORS:
+                    # Retrying with the same token would fail forever, so start from now.
+                    # Broadcasts in between are missed, the next vote of each poll catches up
+                    logger.error("Backplane change stream can't resume, restarting from now")
+                    self._resume_token = None
+                else:
+                    logger.warning("Backplane change stream interrupted, retrying...", exc_info=True)
+                await asyncio.sleep(self.RETRY_DELAY_SECONDS)
+
+
+BACKPLANES = {
+    "memory": InProcessBackplane,
+    "mongo": MongoChangeStreamBackplane,
+}
+
+
+def create_backplane(name: str = settings.BROADCAST_BACKPLANE) -> Backplane:
+    """Build the backplane selected by the `BROADCAST_BACKPLANE` setting."""
+
+    try:
+        return BACKPLANES[name]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown broadcast backplane '{name}', expected one of: {', '.join(BACKPLANES)}"
+        )
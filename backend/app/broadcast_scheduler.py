@@ -0,0 +1,128 @@
+import asyncio
+import logging
+from typing import Dict
+
+from app.config import settings
+from app.database import get_database
+from app.models import PollVotesInDB
+from app.websocket_manager import manager
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastScheduler:
+    """Coalesces result broadcasts for polls that receive many votes.
+
+       - Votes only mark their poll as dirty, which is a cheap dict insert
+       - A background task flushes dirty polls at most once per interval
+       - Votes that already know the new counts hand them over, the rest
+         are read for all dirty polls in a single query
+       - Every broadcast is a snapshot tagged with the poll's sequence number
+       - The vote request never waits for the read or the fan-out
+       - Polls whose read or broadcast failed stay dirty for the next flush
+    """
+
+    def __init__(self, interval_ms: int = settings.BROADCAST_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        # Key: poll_id (str), Value: Latest known vote counts, or None if unknown
+        self._dirty: Dict[str, PollVotesInDB | None] = {}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def mark_dirty(self, poll_id: str, votes: PollVotesInDB | None = None):
+        """Schedule a results broadcast for a poll on the next flush."""
+
+        if poll_id in self._dirty:
+            known = self._dirty[poll_id]
+            if known is None or votes is None:
+                # The flush will read fresh counts for this poll anyway
+                votes = None
+
+            # Concurrent votes don't necessarily finish in the order they were applied,
+            # the snapshot with the higher sequence number is the newer one
+            elif known.seq > votes.seq:
+                votes = known
+
+        self._dirty[poll_id] = votes
+        self._wakeup.set()
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task, sending out any pending updates first."""
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.error("Failed to flush scheduled broadcasts", exc_info=True)
+
+            # Anything marked dirty during the sleep is picked up by the next flush
+            await asyncio.sleep(self.interval)
+
+    async def flush(self):
+        """Broadcast the latest vote counts of every dirty poll."""
+
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, {}
+
+        snapshots = {poll_id: votes for poll_id, votes in dirty.items() if votes is not None}
+        unknown = [poll_id for poll_id, votes in dirty.items() if votes is None]
+
+        try:
+            if unknown:
+                cursor = get_database().polls.find(
+                    {"poll_id": {"$in": unknown}}, {"_id": 0, "poll_id": 1, "votes": 1, "seq": 1}
+                )
+                async for poll_doc in cursor:
+                    snapshots[poll_doc["poll_id"]] = PollVotesInDB.model_construct(**poll_doc)
+        except BaseException:
+            # Nothing was sent yet, keep every poll for the next flush
+            self._requeue(dirty)
+            raise
+
+        poll_ids = list(snapshots)
+        try:
+            results = await asyncio.gather(
+                *(
+                    manager.broadcast(poll_id, {"seq": votes.seq, "votes": votes.votes})
+                    for poll_id, votes in snapshots.items()
+                ),
+                return_exceptions=True,
+            )
+        except BaseException:
+            # Interrupted halfway. Snapshots are safe to send twice, clients skip stale ones
+            self._requeue(snapshots)
+            raise
+
+        errors = {
+            poll_id: result
+            for poll_id, result in zip(poll_ids, results)
+            if isinstance(result, Exception)
+        }
+        if errors:
+            self._requeue({poll_id: snapshots[poll_id] for poll_id in errors})
+            raise next(iter(errors.values()))
+
+    def _requeue(self, dirty: Dict[str, PollVotesInDB | None]):
+        # Merged with anything marked dirty since, keeping the newest counts
+        for poll_id, votes in dirty.items():
+            self.mark_dirty(poll_id, votes)
+
+
+# Global BroadcastScheduler instance
+broadcast_scheduler = BroadcastScheduler()
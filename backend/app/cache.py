@@ -0,0 +1,74 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+from app.config import settings
+from app.metrics import registry, CallbackMetric
+
+
+class LRUTTLCache:
+    """Bounded in-process cache with least-recently-used eviction and a time to live.
+
+       - Holds at most `maxsize` entries, the least recently used one is dropped first
+       - Entries older than `ttl` seconds count as misses and are dropped on access
+       - Counts hits and misses, so the cache's usefulness can be checked
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # Key: cache key, Value: (expiry timestamp, cached value)
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the cached value for a key, or None if it's missing or stale."""
+
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires, value = entry
+        if time.monotonic() >= expires:
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Immutable poll fields (question, options, settings, creator key), keyed by poll_id
+poll_metadata_cache = LRUTTLCache(
+    maxsize=settings.POLL_CACHE_SIZE, ttl=settings.POLL_CACHE_TTL_SECONDS
+)
+
+registry.register(
+    CallbackMetric(
+        "poll_metadata_cache_lookups_total",
+        "Poll metadata cache lookups by result.",
+        lambda: [(("hit",), poll_metadata_cache.hits), (("miss",), poll_metadata_cache.misses)],
+        labelnames=("result",),
+        kind="counter",
+    )
+)
@@ -11,4 +11,97 @@ class Settings(BaseSettings):
     # Comma separated string of allowed origins
     ALLOWED_ORIGINS: str = "http://localhost:3000"
 
+    # Read by uvicorn, not the app: proxy addresses (comma separated IPs or CIDRs) whose
+    # X-Forwarded-For is trusted. Rate limits and connection limits key on the resulting IP
+    FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+
+    # Pub/sub layer used to fan out result updates across workers ("memory" or "mongo")
+    BROADCAST_BACKPLANE: str = "memory"
+
+    # Minimum time between two result broadcasts for the same poll
+    BROADCAST_INTERVAL_MS: int = 100
+
+    # Outbound WebSocket queue length per client, older snapshots are replaced when full
+    WS_SEND_QUEUE_SIZE: int = 1
+    # Clients are disconnected after this many consecutive updates were replaced unsent
+    WS_MAX_DROPPED_UPDATES: int = 50
+    WS_SEND_TIMEOUT_SECONDS: float = 10
+    # Live results connections allowed per worker, per poll and per client IP (0 for no limit)
+    WS_MAX_CONNECTIONS: int = 50000
+    WS_MAX_CONNECTIONS_PER_POLL: int = 20000
+    WS_MAX_CONNECTIONS_PER_CLIENT: int = 100
+    # Broadcasts to more clients than this yield to the event loop between chunks
+    WS_FANOUT_CHUNK_SIZE: int = 1000
+    # Result deltas kept per poll, for clients reconnecting with `?since=`
+    WS_DELTA_HISTORY: int = 128
+    # Comment lines sent on idle Server-Sent Events streams, so proxies keep them open
+    SSE_KEEPALIVE_SECONDS: float = 15
+
+    # In-process cache for the fields of a poll that never change after creation
+    POLL_CACHE_SIZE: int = 10000
+    POLL_CACHE_TTL_SECONDS: float = 60
+    # Cache-Control max-age for a poll's public data, also bounded by the poll's expiry
+    POLL_HTTP_MAX_AGE_SECONDS: int = 300
+    # Page sizes of a creator's poll list
+    POLL_LIST_PAGE_SIZE: int = 20
+    POLL_LIST_MAX_PAGE_SIZE: int = 100
+
+    # Turnstile verification ("cloudflare", or "stub" to run load tests offline)
+    TURNSTILE_BACKEND: str = "cloudflare"
+    TURNSTILE_HTTP2: bool = False
+    TURNSTILE_CONNECT_TIMEOUT_SECONDS: float = 3
+    TURNSTILE_READ_TIMEOUT_SECONDS: float = 5
+    TURNSTILE_MAX_CONCURRENCY: int = 100
+    # Token that the stub backend rejects, for exercising the failure path
+    TURNSTILE_STUB_REJECT_TOKEN: str = "invalid"
+
+    # Global counters are buffered per worker and flushed to one of several shard documents
+    STATS_FLUSH_INTERVAL_SECONDS: float = 5
+    STATS_COUNTER_SHARDS: int = 8
+    STATS_CACHE_TTL_SECONDS: float = 30
+
+    # Optional JSON file with "attr1", "attr2" and "things" word lists for poll IDs
+    POLL_ID_WORDS_FILE: str | None = None
+    POLL_ID_MAX_ATTEMPTS: int = 10
+
+    # Write-behind voting: votes are acknowledged once buffered and written in batches
+    VOTE_WRITE_BEHIND: bool = False
+    VOTE_FLUSH_INTERVAL_MS: int = 20
+    VOTE_FLUSH_MAX_BATCH: int = 500
+    # Votes waiting in the buffer, e.g. while MongoDB is down, before new ones are refused
+    VOTE_BUFFER_MAX_PENDING: int = 50000
+
+    # Vote batches need the poll's creator key, or one of these comma separated integrator keys
+    VOTE_BATCH_API_KEYS: str = ""
+    VOTE_BATCH_MAX_SIZE: int = 100
+
+    # Width of the time buckets counting votes for results charts
+    VOTE_BUCKET_SECONDS: int = 60
+    VOTE_HISTORY_FLUSH_INTERVAL_SECONDS: float = 1
+    # Buckets returned per history request, a day of one-minute buckets
+    VOTE_HISTORY_MAX_BUCKETS: int = 1440
+    # Vote buckets read per database round trip while streaming a results export
+    EXPORT_CURSOR_BATCH_SIZE: int = 1000
+
+    # Token bucket rate limits ("memory" per worker, or "mongo" shared by all workers)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_CREATE_PER_MINUTE: float = 10  # Poll creations per client IP
+    RATE_LIMIT_CREATE_BURST: int = 10
+    RATE_LIMIT_VOTE_PER_MINUTE: float = 120  # Votes per client IP
+    RATE_LIMIT_VOTE_BURST: int = 60
+    RATE_LIMIT_BATCH_PER_MINUTE: float = 10  # Vote batches per client IP
+    RATE_LIMIT_BATCH_BURST: int = 5
+    RATE_LIMIT_FINGERPRINT_PER_MINUTE: float = 10  # Votes per voter fingerprint
+    RATE_LIMIT_FINGERPRINT_BURST: int = 5
+
+    # Prometheus metrics at /metrics, with per-poll connection counts for the N busiest polls.
+    # Off by default, the poll IDs and load figures are not for the public.
+    # When off, requests and MongoDB commands aren't timed at all
+    METRICS_ENABLED: bool = False
+    # If set, scrapers must send "Authorization: Bearer <token>"
+    METRICS_TOKEN: str | None = None
+    METRICS_HOT_POLLS: int = 10
+
 settings = Settings()
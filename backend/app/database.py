@@ -2,6 +2,7 @@ import logging
 
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from .config import settings
+from .metrics import MongoCommandListener
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +17,10 @@ mongodb = MongoDB()
 
 async def connect_to_mongo():
     logger.info("Connecting to MongoDB...")
-    mongodb.client = AsyncIOMotorClient(settings.MONGO_CONNECTION_STRING)
+    mongodb.client = AsyncIOMotorClient(
+        settings.MONGO_CONNECTION_STRING,
+        event_listeners=[MongoCommandListener()] if settings.METRICS_ENABLED else [],
+    )
     # The database name can be taken from the connection string
     # Or be set explicitly like this : mongodb.client["db_name"]
     mongodb.db = mongodb.client.get_default_database()
@@ -32,13 +36,27 @@ async def setup_database_indexes():
     # Unique index on poll_id for fast lookups and to prevent duplicates
     await db.polls.create_index("poll_id", unique=True)
 
-    # Index on creator_key for fetch    ing user-created polls
-    await db.polls.create_index("creator_key")
+    # Index on creator_key for fetching user-created polls, newest first.
+    # Also serves the keyset pagination of the poll list without an in-memory sort
+    await db.polls.create_index([("creator_key", 1), ("created_at", -1), ("_id", -1)])
 
     # TTL index for automatic document deletion
     # Documents will be deleted 0 seconds after the time specified in 'expire_at'
     await db.polls.create_index("expire_at", expireAfterSeconds=0)
 
+    # One record per voter and poll, the unique index is the duplicate vote check
+    await db.poll_voters.create_index([("poll_id", 1), ("fp", 1)], unique=True)
+
+    # Voter records expire together with their poll
+    await db.poll_voters.create_index("expire_at", expireAfterSeconds=0)
+
+    # Vote history buckets are read as a time range of a single poll, and expire with it
+    await db.poll_vote_buckets.create_index([("poll_id", 1), ("start", 1)], unique=True)
+    await db.poll_vote_buckets.create_index("expire_at", expireAfterSeconds=0)
+
+    # Shared rate limit counters expire after their window
+    await db.rate_limits.create_index("expire_at", expireAfterSeconds=0)
+
     logger.info("Database indexes are configured.")
 
 
@@ -5,6 +5,10 @@ class PollCreationError(Exception):
 class PollAccessDeniedError(Exception):
     pass
 
+# For listing a creator's polls with a cursor that wasn't issued by us
+class InvalidCursorError(Exception):
+    pass
+
 # A base class for all voting-related errors
 class VotingError(Exception):
     pass
@@ -20,4 +24,11 @@ class AlreadyVotedError(VotingError):
     pass
 
 class InvalidOptionsError(VotingError):
+    pass
+
+class VoteBufferFullError(VotingError):
+    pass
+
+# For live results connections over the worker's limits
+class ConnectionLimitError(Exception):
     pass
\ No newline at end of file
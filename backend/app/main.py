@@ -1,14 +1,29 @@
 import logging
+import secrets
 import sys
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
-from .database import connect_to_mongo, close_mongo_connection, setup_database_indexes
+from .database import (
+    connect_to_mongo,
+    close_mongo_connection,
+    get_database,
+    setup_database_indexes,
+)
+from .migrations import run_migrations
+from .metrics import registry, HTTPMetricsMiddleware
 from .api import polls as polls_router
+from .api import stats as stats_router
+from .websocket_manager import manager
+from .broadcast_scheduler import broadcast_scheduler
+from .services.security import turnstile_verifier
+from .services.stats import stats_aggregator
+from .services.vote_buffer import vote_buffer
+from .services.vote_history import vote_history_recorder
 
 # Set up logging
 logger = logging.getLogger()  # Root Logger
@@ -27,9 +42,31 @@ async def lifespan(app: FastAPI):
     # Runs on startup
     await connect_to_mongo()
     await setup_database_indexes()
+    # Before serving votes, voters from before the upgrade must be in `poll_voters`
+    await run_migrations(get_database())
+    await turnstile_verifier.start()
+    await manager.start()
+    await broadcast_scheduler.start()
+    await stats_aggregator.start()
+    await vote_history_recorder.start()
+    if settings.VOTE_WRITE_BEHIND:
+        await vote_buffer.start()
     yield
-    # Runs on shutdown
-    await close_mongo_connection()
+    # Runs on shutdown, every step even if an earlier one fails
+    shutdown_steps = (
+        vote_buffer.stop,  # Flushes votes, which feed the stats and broadcasts
+        stats_aggregator.stop,
+        vote_history_recorder.stop,
+        broadcast_scheduler.stop,
+        manager.stop,
+        turnstile_verifier.close,
+        close_mongo_connection,
+    )
+    for step in shutdown_steps:
+        try:
+            await step()
+        except Exception:
+            logger.error(f"Shutdown step {step.__qualname__} failed", exc_info=True)
 
 
 # FastAPI app instance
@@ -58,6 +95,11 @@ async def log_exceptions_middleware(request: Request, call_next):
         )
 
 
+# Count and time requests per route, added after the above so it also sees its 500s
+if settings.METRICS_ENABLED:
+    app.add_middleware(HTTPMetricsMiddleware)
+
+
 # Setup CORS
 origins = [origin.strip() for origin in settings.ALLOWED_ORIGINS.split(",")]
 
@@ -72,6 +114,7 @@ app.add_middleware(
 
 # Regiser the router for poll related routes
 app.include_router(polls_router.router, prefix="/api", tags=["Polls"])
+app.include_router(stats_router.router, prefix="/api", tags=["Stats"])
 
 
 @app.get("/")
@@ -79,3 +122,20 @@ def read_root():
     """Check if API is working."""
 
     return {"message": "Welcome to the Poll API"}
+
+
+if settings.METRICS_ENABLED:
+
+    @app.get("/metrics", include_in_schema=False)
+    def read_metrics(request: Request):
+        """Expose this worker's metrics in the Prometheus text format."""
+
+        if settings.METRICS_TOKEN:
+            authorization = request.headers.get("Authorization", "").encode()
+            expected = f"Bearer {settings.METRICS_TOKEN}".encode()
+            if not secrets.compare_digest(authorization, expected):
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+        return PlainTextResponse(
+            registry.render(), media_type="text/plain; version=0.0.4"
+        )
@@ -0,0 +1,279 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from pymongo import monitoring
+
+# Label values of a single series, in the order of the metric's label names
+LabelValues = Tuple[str, ...]
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (1, 10, 100, 1000, 10000, 100000)
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metric(ABC):
+    """Base class for metrics rendered in the Prometheus text format.
+
+       Updates mostly run on the event loop thread, but the MongoDB listener runs
+       on driver threads. Each metric has a lock, taken for updates and to copy the
+       series when rendering, so a scrape never iterates a dict that is changing.
+       Series are created on first use, per label values.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """The sample lines of every series."""
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+            for labels, value in values
+        ]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        # Key: label values, Value: [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labelvalues: str):
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 2)
+
+            # Counts are stored per bucket and only made cumulative when rendered
+            series[bucket] += 1
+            series[-1] += value
+
+    def time(self, *labelvalues: str) -> "_Timer":
+        """Context manager observing the duration of its block."""
+
+        return _Timer(self, labelvalues)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            all_series = [(values, list(series)) for values, series in self._series.items()]
+
+        lines = []
+        for values, series in all_series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series):
+                cumulative += count
+                labels = _format_labels(self.labelnames, values, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {series[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labelvalues", "started")
+
+    def __init__(self, histogram: Histogram, labelvalues: LabelValues):
+        self.histogram = histogram
+        self.labelvalues = labelvalues
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labelvalues)
+
+
+class CallbackMetric(Metric):
+    """A metric whose samples are computed on scrape, for state that is already tracked elsewhere."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], Iterable[Tuple[LabelValues, float]]],
+        labelnames: Iterable[str] = (),
+        kind: str = "gauge",
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+        self.kind = kind
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} {value}"
+            for values, value in self.collect()
+        ]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# Hot path metrics ===
+
+http_requests = registry.register(
+    Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+)
+http_request_duration = registry.register(
+    Histogram("http_request_duration_seconds", "HTTP request latency by route.", ("method", "route"))
+)
+turnstile_duration = registry.register(
+    Histogram("turnstile_verify_duration_seconds", "Turnstile verification latency.")
+)
+turnstile_failures = registry.register(
+    Counter("turnstile_failures_total", "Failed Turnstile verifications by reason.", ("reason",))
+)
+mongo_command_duration = registry.register(
+    Histogram("mongo_command_duration_seconds", "MongoDB command latency.", ("command",))
+)
+mongo_command_failures = registry.register(
+    Counter("mongo_command_failures_total", "Failed MongoDB commands.", ("command",))
+)
+rate_limited_requests = registry.register(
+    Counter("rate_limited_requests_total", "Requests refused by a rate limit.", ("limit",))
+)
+broadcast_duration = registry.register(
+    Histogram("broadcast_duration_seconds", "Time to fan a broadcast out to this worker's clients.")
+)
+broadcast_fanout = registry.register(
+    Histogram(
+        "broadcast_fanout_clients",
+        "Number of local clients a broadcast was fanned out to.",
+        buckets=SIZE_BUCKETS,
+    )
+)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Records the latency of every MongoDB command, using the driver's own timings."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongo_command_duration.observe(event.duration_micros / 1_000_000, event.command_name)
+
+    def failed(self, event):
+        mongo_command_duration.observe(event.duration_micros / 1_000_000, event.command_name)
+        mongo_command_failures.inc(event.command_name)
+
+
+class HTTPMetricsMiddleware:
+    """Counts and times requests per route template.
+
+       A plain ASGI middleware, as `@app.middleware("http")` runs every request
+       in an extra task with memory streams between it and the app.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        # Key: id of a route (routes aren't hashable), Value: its full path template
+        self._templates: Dict[int, str] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500  # If the app fails before responding
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The template rather than the raw path, to keep the label set small
+            route = self._route_template(scope)
+            http_requests.inc(scope["method"], route, str(status))
+            http_request_duration.observe(time.perf_counter() - started, scope["method"], route)
+
+    def _route_template(self, scope) -> str:
+        route = scope.get("route")
+        if route is None:
+            return "unmatched"
+        template = self._templates.get(id(route))
+        if template is None:
+            # Depending on the FastAPI version, the path of a route from an included
+            # router may lack the router's prefix. It's what comes before the part
+            # of the request path that the route matches
+            path = scope["path"]
+            prefix = next(
+                (
+                    path[:i]
+                    for i in range(len(path))
+                    if path[i] == "/" and route.path_regex.match(path[i:])
+                ),
+                "",
+            )
+            template = self._templates[id(route)] = prefix + route.path
+        return template
+
@@ -0,0 +1,107 @@
+"""
+Data migrations for deployments that predate a schema change. Every step is idempotent
+and safe to run while the app serves requests, so they run on every startup.
+They can also be run by hand from the backend directory with:
+
+    python -m app.migrations
+"""
+
+import asyncio
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from .database import (
+    connect_to_mongo,
+    close_mongo_connection,
+    get_database,
+    setup_database_indexes,
+)
+from .services.voter_store import voter_record, DUPLICATE_KEY_ERROR
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+INDEX_NOT_FOUND_ERROR = 27
+
+
+async def migrate_embedded_voters(db: AsyncIOMotorDatabase):
+    """
+    Moves fingerprints from the old `polls.voters` arrays into the `poll_voters` collection.
+    Safe to run repeatedly and while the app is serving votes.
+    """
+
+    migrated_polls = 0
+    cursor = db.polls.find(
+        {"voters": {"$exists": True}}, {"poll_id": 1, "voters": 1, "expire_at": 1}
+    )
+
+    async for poll_doc in cursor:
+        records = []
+        for fingerprint in poll_doc["voters"]:
+            try:
+                records.append(
+                    voter_record(poll_doc["poll_id"], fingerprint, poll_doc["expire_at"])
+                )
+            except ValueError:
+                logger.warning(
+                    f"Skipping non-hex fingerprint on poll '{poll_doc['poll_id']}'"
+                )
+
+        for start in range(0, len(records), BATCH_SIZE):
+            try:
+                await db.poll_voters.insert_many(
+                    records[start : start + BATCH_SIZE], ordered=False
+                )
+            except BulkWriteError as e:
+                # Records that already exist are expected on a re-run
+                if any(
+                    error["code"] != DUPLICATE_KEY_ERROR
+                    for error in e.details["writeErrors"]
+                ):
+                    raise
+
+        # Only drop the array once every fingerprint is safely stored
+        await db.polls.update_one({"_id": poll_doc["_id"]}, {"$unset": {"voters": ""}})
+        migrated_polls += 1
+
+    logger.info(f"Moved voters of {migrated_polls} poll(s) into 'poll_voters'.")
+
+
+async def drop_creator_key_index(db: AsyncIOMotorDatabase):
+    """
+    Drops the old single-field `creator_key` index, which the compound
+    (creator_key, created_at, _id) index of the poll list makes redundant.
+    """
+
+    try:
+        await db.polls.drop_index("creator_key_1")
+    except OperationFailure as e:
+        # Already dropped, or a deployment that never had it
+        if e.code != INDEX_NOT_FOUND_ERROR:
+            raise
+        return
+    logger.info("Dropped the redundant 'creator_key_1' index.")
+
+
+async def run_migrations(db: AsyncIOMotorDatabase):
+    """Runs every migration step, in order."""
+
+    await migrate_embedded_voters(db)
+    await drop_creator_key_index(db)
+
+
+async def main():
+    await connect_to_mongo()
+    try:
+        await setup_database_indexes()
+        await run_migrations(get_database())
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -1,7 +1,16 @@
 import uuid
 from datetime import datetime, timedelta, timezone
-from pydantic import BaseModel, Field, field_validator, ConfigDict, field_serializer
-from typing import List, Dict
+from pydantic import (
+    BaseModel,
+    Field,
+    field_validator,
+    ConfigDict,
+    field_serializer,
+    PrivateAttr,
+)
+from typing import List, Dict, Literal
+
+from app.config import settings
 
 # Helper Models ===
 
@@ -12,7 +21,9 @@ class Option(BaseModel):
 
 
 # datetime serializer that suffixes a 'Z' to specify that it is UTC
-def serialize_dt_z(dt: datetime, _info):
+def serialize_dt_z(dt: datetime | None, _info):
+    if dt is None:
+        return None
     if dt.tzinfo is None:
         dt = dt.replace(tzinfo=timezone.utc)  # Assume UTC
     return dt.isoformat().replace("+00:00", "Z")
@@ -72,6 +83,10 @@ class PollPublic(BaseModel):
 
     _serialize_datetimes = field_serializer("active_until", "expire_at")(serialize_dt_z)
 
+    # Encoded JSON of the fields above and its ETag, filled in once by `app.serialization`
+    _public_json: bytes | None = PrivateAttr(default=None)
+    _etag: str | None = PrivateAttr(default=None)
+
 
 class PollResults(PollPublic):
     """Public details + vote counts. (inherits from PollPublic)"""
@@ -86,7 +101,31 @@ class VoteCreate(BaseModel):
         ..., min_length=1, max_length=10
     )  # Max 10 choices per vote
     turnstile_token: str = Field(..., max_length=4096)
-    voter_fingerprint: str = Field(..., min_length=32, max_length=32)
+    # 128-bit hex hash, stored as 16 bytes in the voter store
+    voter_fingerprint: str = Field(..., pattern=r"^[0-9a-fA-F]{32}$")
+
+
+class VoteBucket(BaseModel):
+    """Votes per option cast within one time bucket, starting at `start`."""
+
+    start: datetime
+    votes: Dict[str, int] = Field(default_factory=dict)
+
+    _serialize_datetimes = field_serializer("start")(serialize_dt_z)
+
+
+class PollVoteHistory(BaseModel):
+    """
+    Votes of a poll over time, in buckets of `bucket_seconds`. Buckets without votes are left out.
+    A page is capped, `next_start` is set when the range may have more buckets after it.
+    """
+
+    poll_id: str
+    bucket_seconds: int
+    buckets: List[VoteBucket]
+    next_start: datetime | None = None
+
+    _serialize_datetimes = field_serializer("next_start")(serialize_dt_z)
 
 
 class VoteSuccessResponse(BaseModel):
@@ -95,9 +134,84 @@ class VoteSuccessResponse(BaseModel):
     message: str = "Vote cast successfully."
 
 
+class BatchVoteEntry(BaseModel):
+    """A single vote inside a batch, covered by the batch's Turnstile token."""
+
+    option_ids: List[str] = Field(..., min_length=1, max_length=10)
+    voter_fingerprint: str = Field(..., pattern=r"^[0-9a-fA-F]{32}$")
+
+
+class VoteBatchCreate(BaseModel):
+    """Model for uploading many votes for one poll at once, e.g. from kiosks."""
+
+    turnstile_token: str = Field(..., max_length=4096)
+    votes: List[BatchVoteEntry] = Field(
+        ..., min_length=1, max_length=settings.VOTE_BATCH_MAX_SIZE
+    )
+
+
+class BatchVoteResult(BaseModel):
+    """Outcome of one entry of a vote batch, `index` is its position in the request."""
+
+    index: int
+    status: Literal["accepted", "already_voted", "invalid_options", "failed"]
+    detail: str | None = None
+
+
+class VoteBatchResponse(BaseModel):
+    """Response for a vote batch, with the status of every entry."""
+
+    accepted: int
+    results: List[BatchVoteResult]
+
+
+class PollSummary(BaseModel):
+    """A poll as listed to its creator, without options or per-option counts."""
+
+    poll_id: str
+    question: str
+    public_results: bool
+    created_at: datetime
+    active_until: datetime
+    expire_at: datetime
+    total_votes: int = 0
+
+    _serialize_datetimes = field_serializer("created_at", "active_until", "expire_at")(
+        serialize_dt_z
+    )
+
+
+class PollSummaryPage(BaseModel):
+    """One page of a creator's polls, newest first. Pass `next_cursor` to get the next one."""
+
+    polls: List[PollSummary]
+    next_cursor: str | None = None
+
+
+class GlobalStats(BaseModel):
+    """Totals across all polls."""
+
+    total_polls_created: int = 0
+    total_votes_cast: int = 0
+
+
 # Database Models ===
 
 
+class PollMetadata(PollPublic):
+    """The fields of a poll that never change after creation, safe to cache."""
+
+    creator_key: str
+
+
+class PollVotesInDB(BaseModel):
+    """Just the vote counts of a poll, with the sequence number they were written at."""
+
+    poll_id: str
+    votes: Dict[str, int] = Field(default_factory=dict)
+    seq: int = 0
+
+
 class PollInDB(BaseModel):
     """Model representing the poll document in MongoDB."""
 
@@ -113,7 +227,9 @@ class PollInDB(BaseModel):
     options: List[Option]
     allow_multiple_choices: bool
     votes: Dict[str, int] = Field(default_factory=dict)
-    voters: List[str] = Field(default_factory=list)  # List of voter fingerprints
+    # Incremented with every write to `votes`, orders result updates across workers
+    seq: int = 0
+    # Voter fingerprints live in the separate `poll_voters` collection
 
     # Lifecycle fields
     theme: str
@@ -0,0 +1,85 @@
+import asyncio
+from collections import deque
+from typing import Deque, Dict, Tuple
+
+import orjson
+
+
+def snapshot_frame(seq: int, votes: Dict[str, int]) -> str:
+    """Full vote counts of a poll as of `seq`."""
+
+    return orjson.dumps({"type": "snapshot", "seq": seq, "votes": votes}).decode()
+
+
+def delta_frame(seq: int, prev: int, votes: Dict[str, int]) -> str:
+    """
+    New counts of only the options that changed between `prev` and `seq`.
+    Counts are absolute, so a client at any sequence in `[prev, seq)` can apply it.
+    """
+
+    return orjson.dumps({"type": "delta", "seq": seq, "prev": prev, "votes": votes}).decode()
+
+
+class PollStream:
+    """Versioned results of a poll as seen by this worker.
+
+       - `seq` comes from the poll document and grows with every vote write,
+         so it orders updates the same way on every worker
+       - Keeps the latest vote counts, to turn incoming snapshots into deltas
+       - Keeps the most recent deltas, so reconnecting clients can catch up
+         on what they missed instead of getting everything again
+    """
+
+    __slots__ = ("seq", "votes", "history", "fanout_lock", "_snapshot")
+
+    def __init__(self, seq: int, votes: Dict[str, int], history_size: int):
+        self.seq = seq
+        self.votes = votes
+        # Entries of (seq, prev, changed counts), oldest first
+        self.history: Deque[Tuple[int, int, Dict[str, int]]] = deque(maxlen=history_size)
+        # Held by the ConnectionManager while it fans out an update of this poll
+        self.fanout_lock = asyncio.Lock()
+        self._snapshot: str | None = None
+
+    def advance(self, seq: int, votes: Dict[str, int]) -> Dict[str, int] | None:
+        """
+        Move to a newer snapshot, returning the counts that changed.
+        Returns None for snapshots that are not newer, e.g. ones that arrived out of order.
+        """
+
+        if seq <= self.seq:
+            return None
+
+        changed = {
+            opt_id: count for opt_id, count in votes.items() if self.votes.get(opt_id) != count
+        }
+        self.history.append((seq, self.seq, changed))
+        self.seq = seq
+        self.votes = votes
+        self._snapshot = None
+        return changed
+
+    def snapshot(self) -> str:
+        """The current counts as a snapshot frame, encoded once per sequence number."""
+
+        if self._snapshot is None:
+            self._snapshot = snapshot_frame(self.seq, self.votes)
+        return self._snapshot
+
+    def catch_up(self, since: int | None) -> str | None:
+        """
+        The frame that brings a client at sequence `since` up to date, or None if it already is.
+        Falls back to a snapshot when the client is unknown, ahead, or too far behind.
+        """
+
+        if since == self.seq:
+            return None
+        if since is None or since > self.seq or not self.history or self.history[0][1] > since:
+            return self.snapshot()
+
+        # Merge every delta after `since`, later counts win
+        changed: Dict[str, int] = {}
+        for seq, prev, votes in self.history:
+            if seq > since:
+                changed.update(votes)
+        return delta_frame(self.seq, since, changed)
@@ -0,0 +1,85 @@
+import hashlib
+from datetime import datetime, timezone
+from typing import Dict
+
+import orjson
+from fastapi import Response
+
+from app.config import settings
+from app.models import PollPublic
+
+# Naive datetimes from Mongo are UTC, and UTC is written with a 'Z' like `serialize_dt_z` does
+ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+
+class JSONBytesResponse(Response):
+    """Response for a body that is already encoded as JSON."""
+
+    media_type = "application/json"
+
+
+def _public_payload(poll: PollPublic) -> dict:
+    """The fields of `PollPublic`, in its field order, without going through Pydantic."""
+
+    return {
+        "poll_id": poll.poll_id,
+        "question": poll.question,
+        "options": [{"id": option.id, "text": option.text} for option in poll.options],
+        "allow_multiple_choices": poll.allow_multiple_choices,
+        "theme": poll.theme,
+        "active_until": poll.active_until,
+        "expire_at": poll.expire_at,
+        "public_results": poll.public_results,
+    }
+
+
+def encode_poll_public(poll: PollPublic) -> bytes:
+    """
+    Encode the public view of a poll, byte for byte as the `PollPublic` response model would.
+    The result is kept on the poll object, so a cached poll is only ever encoded once.
+    """
+
+    if poll._public_json is None:
+        poll._public_json = orjson.dumps(_public_payload(poll), option=ORJSON_OPTIONS)
+    return poll._public_json
+
+
+def encode_poll_results(poll: PollPublic, votes: Dict[str, int]) -> bytes:
+    """
+    Encode the results view of a poll, byte for byte as the `PollResults` response model would.
+    `votes` is the last field, so it's spliced onto the already encoded public view.
+    """
+
+    return encode_poll_public(poll)[:-1] + b',"votes":' + orjson.dumps(votes) + b"}"
+
+
+def poll_etag(poll: PollPublic) -> str:
+    """Strong ETag of a poll's public view, a hash of its exact encoded bytes."""
+
+    if poll._etag is None:
+        digest = hashlib.blake2b(encode_poll_public(poll), digest_size=16).hexdigest()
+        poll._etag = f'"{digest}"'
+    return poll._etag
+
+
+def poll_cache_headers(poll: PollPublic) -> Dict[str, str]:
+    """
+    Caching headers for a poll's public view. It never changes, so it may be cached
+    until the poll expires, capped so that deleted polls don't linger in caches for long.
+    """
+
+    expire_at_aware = poll.expire_at.replace(tzinfo=timezone.utc)
+    remaining = (expire_at_aware - datetime.now(timezone.utc)).total_seconds()
+    max_age = max(0, min(int(remaining), settings.POLL_HTTP_MAX_AGE_SECONDS))
+
+    return {"ETag": poll_etag(poll), "Cache-Control": f"public, max-age={max_age}"}
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an `If-None-Match` header covers an ETag, using weak comparison as required."""
+
+    if if_none_match.strip() == "*":
+        return True
+
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
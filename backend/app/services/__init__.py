@@ -1,4 +1,11 @@
 from .poll_creation import create_poll
-from .poll_retrieval import get_poll_by_id
-from .poll_voting import add_vote
-from .poll_deletion import delete_poll
\ No newline at end of file
+from .poll_retrieval import (
+    get_poll_by_id,
+    get_poll_votes,
+    get_poll_metadata,
+)
+from .poll_listing import list_creator_polls
+from .poll_voting import add_vote, add_votes_batch
+from .poll_deletion import delete_poll
+from .vote_history import get_vote_history, vote_history_recorder
+from .poll_export import export_poll_results, EXPORT_FORMATS
\ No newline at end of file
@@ -1,7 +1,10 @@
 import logging
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.cache import poll_metadata_cache
 from app.exceptions import PollAccessDeniedError
+from .vote_history import delete_vote_history
+from .voter_store import delete_poll_voters
 
 logger = logging.getLogger(__name__)
 
@@ -22,4 +25,8 @@ async def delete_poll(poll_id: str, creator_key: str, db: AsyncIOMotorDatabase):
     if delete_result.deleted_count == 0:
         raise PollAccessDeniedError("Poll not found or access denied.")
 
+    poll_metadata_cache.invalidate(poll_id)
+    await delete_poll_voters(poll_id, db)
+    await delete_vote_history(poll_id, db)
+
     logger.info(f"Poll '{poll_id}' deleted successfully by creator.")
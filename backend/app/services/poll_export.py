@@ -0,0 +1,101 @@
+import csv
+import io
+from typing import AsyncIterator, Dict, Iterable, List
+
+import orjson
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.config import settings
+from app.models import PollMetadata, serialize_dt_z
+from .poll_retrieval import get_poll_votes
+from .vote_history import BUCKET_PROJECTION
+
+# One row per option and total or time bucket, a long format that spreadsheets can pivot
+EXPORT_COLUMNS = ("type", "start", "option_id", "option", "votes")
+
+# Rows are encoded and sent about this many bytes at a time
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+# Cells starting with these are run as formulas by spreadsheet apps
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_cell(value):
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def encode_csv(rows: Iterable[Dict]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_csv_cell(row[column]) for column in EXPORT_COLUMNS] for row in rows)
+    return buffer.getvalue().encode()
+
+
+def encode_ndjson(rows: Iterable[Dict]) -> bytes:
+    return b"".join(orjson.dumps(row) + b"\n" for row in rows)
+
+
+# Key: format name, Value: (media type, row encoder)
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", encode_csv),
+    "ndjson": ("application/x-ndjson", encode_ndjson),
+}
+
+
+def _option_rows(
+    row_type: str, start: str | None, votes: Dict[str, int], option_texts: Dict[str, str]
+) -> List[Dict]:
+    # Every option in the poll's order, so that each total or bucket has the same shape
+    return [
+        {
+            "type": row_type,
+            "start": start,
+            "option_id": opt_id,
+            "option": text,
+            "votes": votes.get(opt_id, 0),
+        }
+        for opt_id, text in option_texts.items()
+    ]
+
+
+async def export_poll_results(
+    poll: PollMetadata, export_format: str, db: AsyncIOMotorDatabase
+) -> AsyncIterator[bytes]:
+    """
+    Stream a poll's results in an `EXPORT_FORMATS` format: the vote totals of every option,
+    then the votes of every option in each time bucket that has any, oldest first.
+
+    Buckets are read through a cursor in batches and sent in chunks as they come,
+    so memory use stays the same however long the poll has been receiving votes.
+    """
+
+    _, encode = EXPORT_FORMATS[export_format]
+    option_texts = {option.id: option.text for option in poll.options}
+
+    if export_format == "csv":
+        yield ",".join(EXPORT_COLUMNS).encode() + b"\r\n"
+
+    poll_votes = await get_poll_votes(poll.poll_id, db)
+    yield encode(_option_rows("total", None, poll_votes.votes if poll_votes else {}, option_texts))
+
+    cursor = (
+        db.poll_vote_buckets.find({"poll_id": poll.poll_id}, BUCKET_PROJECTION)
+        .sort("start", 1)
+        .batch_size(settings.EXPORT_CURSOR_BATCH_SIZE)
+    )
+    chunk = bytearray()
+    try:
+        async for bucket in cursor:
+            start = serialize_dt_z(bucket["start"], None)
+            chunk += encode(_option_rows("bucket", start, bucket["votes"], option_texts))
+            if len(chunk) >= EXPORT_CHUNK_BYTES:
+                yield bytes(chunk)
+                chunk.clear()
+    finally:
+        # Also when the client goes away halfway
+        await cursor.close()
+
+    if chunk:
+        yield bytes(chunk)
@@ -0,0 +1,146 @@
+import json
+import logging
+import random
+from typing import List
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+
+from app.config import settings
+from app.exceptions import PollCreationError
+from app.metrics import registry, CallbackMetric
+
+logger = logging.getLogger(__name__)
+
+# Default word lists for 3-word human-readable IDs (64 x 64 x 64 = 262,144 combinations)
+
+ATTR1 = [
+    "sleepy", "spicy", "aggressive", "awkward", "chaotic", "sparkly", "dramatic",
+    "slow", "loud", "tiny", "brave", "happy", "messy", "angry", "funny", "bouncy",
+    "clumsy", "cranky", "curious", "dizzy", "eager", "fancy", "fearless", "fluffy",
+    "grumpy", "hasty", "hungry", "jolly", "jumpy", "lucky", "mighty", "moody",
+    "nervous", "nosy", "polite", "proud", "quirky", "rowdy", "rusty", "salty", "sassy",
+    "shy", "silly", "sneaky", "soggy", "speedy", "squeaky", "sticky", "stinky", "sulky",
+    "sunny", "swift", "tangled", "tipsy", "wobbly", "zany", "zesty", "giddy", "gentle",
+    "fierce", "cheeky", "cozy", "crispy", "plucky",
+]
+
+ATTR2 = [
+    "blue", "noisy", "invisible", "annoying", "miniature", "lazy", "electric", "bored",
+    "shiny", "quiet", "green", "purple", "fuzzy", "tired", "weird", "red", "orange",
+    "yellow", "pink", "golden", "silver", "crimson", "teal", "violet", "scarlet",
+    "glowing", "frozen", "melting", "wooden", "plastic", "striped", "spotted", "velvet",
+    "crunchy", "bubbly", "dusty", "foggy", "frosty", "glittery", "hollow", "humming",
+    "icy", "magnetic", "misty", "neon", "pastel", "polished", "rubbery", "smoky",
+    "soft", "spiky", "squishy", "stormy", "toasty", "twinkly", "wavy", "wild", "windy",
+    "woolly", "cosmic", "cloudy", "fizzy", "dotted", "minty",
+]
+
+THINGS = [
+    "toaster", "duck", "cactus", "robot", "llama", "potato", "turtle", "cloud",
+    "octopus", "penguin", "fridge", "banana", "squirrel", "chair", "bread", "walrus",
+    "goose", "pickle", "waffle", "teapot", "muffin", "badger", "kettle", "pancake",
+    "donut", "lobster", "hamster", "otter", "panda", "sloth", "koala", "moose",
+    "narwhal", "noodle", "pretzel", "pumpkin", "raccoon", "sandwich", "sock", "spoon",
+    "taco", "tofu", "umbrella", "unicorn", "volcano", "wombat", "yeti", "zebra",
+    "bagel", "blender", "broccoli", "burrito", "cupcake", "dumpling", "ferret",
+    "hedgehog", "lemon", "mango", "marshmallow", "meatball", "pebble", "crayon",
+    "lantern", "biscuit",
+]
+
+
+class PollIdAllocator:
+    """Hands out human-readable poll IDs by inserting directly and retrying on conflicts.
+
+       - No lookup before the insert: the unique `poll_id` index decides, so
+         concurrent creators can never end up with the same ID
+       - Retries are bounded, creation fails instead of looping forever
+       - Counts attempts and collisions, to tell when the word lists need to grow
+    """
+
+    def __init__(
+        self,
+        attr1: List[str],
+        attr2: List[str],
+        things: List[str],
+        max_attempts: int = settings.POLL_ID_MAX_ATTEMPTS,
+    ):
+        self.attr1 = attr1
+        self.attr2 = attr2
+        self.things = things
+        self.max_attempts = max_attempts
+
+        self.attempts = 0
+        self.collisions = 0
+
+    @property
+    def space_size(self) -> int:
+        return len(self.attr1) * len(self.attr2) * len(self.things)
+
+    @property
+    def collision_rate(self) -> float:
+        return self.collisions / self.attempts if self.attempts else 0.0
+
+    def generate(self) -> str:
+        """Draws a random 3-word ID, without checking whether it's in use."""
+
+        adj = random.choice(self.attr1)
+        color = random.choice(self.attr2)
+        thing = random.choice(self.things)
+        return f"{adj}-{color}-{thing}"
+
+    async def insert(self, poll_document: dict, db: AsyncIOMotorDatabase) -> str:
+        """
+        Inserts a poll document, replacing its `poll_id` until one is free.
+        Returns the ID it was stored under, raises PollCreationError once out of attempts.
+        """
+
+        for _ in range(self.max_attempts):
+            self.attempts += 1
+            try:
+                await db.polls.insert_one(poll_document)
+                return poll_document["poll_id"]
+            except DuplicateKeyError as e:
+                # Any other unique key clashing is not something a new ID can fix
+                if "poll_id" not in (e.details or {}).get("keyPattern", {}):
+                    raise
+
+                self.collisions += 1
+                poll_document["poll_id"] = self.generate()
+
+        logger.error(
+            f"No free poll ID after {self.max_attempts} attempts "
+            f"(collision rate {self.collision_rate:.2%})"
+        )
+        raise PollCreationError("Could not allocate a unique poll ID.")
+
+
+def load_word_lists(path: str | None = settings.POLL_ID_WORDS_FILE):
+    """
+    Reads custom word lists from a JSON file with "attr1", "attr2" and "things" arrays.
+    Falls back to the built-in lists when no file is configured.
+    """
+
+    if not path:
+        return ATTR1, ATTR2, THINGS
+
+    with open(path, encoding="utf-8") as f:
+        words = json.load(f)
+    return words["attr1"], words["attr2"], words["things"]
+
+
+# Global PollIdAllocator instance
+poll_id_allocator = PollIdAllocator(*load_word_lists())
+
+registry.register(
+    CallbackMetric(
+        "poll_id_insert_attempts_total",
+        "Poll inserts attempted by the ID allocator, by outcome.",
+        lambda: [
+            (("collision",), poll_id_allocator.collisions),
+            (("success",), poll_id_allocator.attempts - poll_id_allocator.collisions),
+        ],
+        labelnames=("outcome",),
+        kind="counter",
+    )
+)
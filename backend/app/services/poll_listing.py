@@ -0,0 +1,91 @@
+import base64
+import binascii
+from datetime import datetime, timezone
+from typing import Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.exceptions import InvalidCursorError
+from app.models import PollSummary, PollSummaryPage
+
+# Newest first, matching the (creator_key, created_at, _id) index so pages need no in-memory sort
+LIST_SORT = [("created_at", -1), ("_id", -1)]
+
+# Summary fields only, the vote counts are added up by the server into a single number
+SUMMARY_PROJECTION = {
+    "_id": 1,
+    "poll_id": 1,
+    "question": 1,
+    "public_results": 1,
+    "created_at": 1,
+    "active_until": 1,
+    "expire_at": 1,
+    "total_votes": {
+        "$sum": {
+            "$map": {
+                "input": {"$objectToArray": {"$ifNull": ["$votes", {}]}},
+                "in": "$$this.v",
+            }
+        }
+    },
+}
+
+
+def encode_cursor(created_at: datetime, doc_id: str) -> str:
+    """Opaque cursor pointing just after a poll, from its position in the sort order."""
+
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)  # Mongo returns naive UTC
+    # Mongo stores milliseconds, so this round-trips exactly
+    millis = round(created_at.timestamp() * 1000)
+    return base64.urlsafe_b64encode(f"{millis}:{doc_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Raises InvalidCursorError for anything `encode_cursor` didn't produce."""
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        millis, doc_id = raw.split(":", 1)
+        created_at = datetime.fromtimestamp(int(millis) / 1000, timezone.utc)
+    except (binascii.Error, UnicodeDecodeError, ValueError, OverflowError, OSError):
+        raise InvalidCursorError("Invalid pagination cursor.")
+    return created_at, doc_id
+
+
+async def list_creator_polls(
+    creator_key: str, db: AsyncIOMotorDatabase, limit: int, cursor: str | None = None
+) -> PollSummaryPage:
+    """
+    Lists the polls created with a creator key, newest first, `limit` at a time.
+    Pages are read with one indexed query each, seeking past the cursor instead of skipping.
+
+    `total_votes` adds up the counts of every option, so a vote
+    for several options of a multiple choice poll counts once per option.
+    """
+
+    query: dict = {"creator_key": creator_key}
+    if cursor is not None:
+        created_at, doc_id = decode_cursor(cursor)
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": doc_id}},
+        ]
+
+    # One extra document tells whether there is a next page
+    documents = (
+        await db.polls.find(query, SUMMARY_PROJECTION)
+        .sort(LIST_SORT)
+        .limit(limit + 1)
+        .to_list(length=limit + 1)
+    )
+
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        last = documents[-1]
+        next_cursor = encode_cursor(last["created_at"], last["_id"])
+
+    return PollSummaryPage(
+        polls=[PollSummary.model_validate(document) for document in documents],
+        next_cursor=next_cursor,
+    )
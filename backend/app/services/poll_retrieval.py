@@ -1,5 +1,26 @@
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from app.models import PollInDB
+from app.cache import poll_metadata_cache
+from app.models import (
+    PollInDB,
+    PollVotesInDB,
+    PollMetadata,
+)
+
+# Mongo projections, so each view only reads the fields it returns
+PUBLIC_PROJECTION = {
+    "_id": 0,
+    "poll_id": 1,
+    "question": 1,
+    "options": 1,
+    "allow_multiple_choices": 1,
+    "theme": 1,
+    "active_until": 1,
+    "expire_at": 1,
+    "public_results": 1,
+}
+METADATA_PROJECTION = {**PUBLIC_PROJECTION, "creator_key": 1}
+VOTES_PROJECTION = {"_id": 0, "poll_id": 1, "votes": 1, "seq": 1}
+
 
 async def get_poll_by_id(poll_id: str, db: AsyncIOMotorDatabase) -> PollInDB | None:
     """
@@ -12,4 +33,38 @@ async def get_poll_by_id(poll_id: str, db: AsyncIOMotorDatabase) -> PollInDB | N
     if poll_document:
         return PollInDB.model_validate(poll_document)
     
-    return None
\ No newline at end of file
+    return None
+
+
+async def get_poll_metadata(
+    poll_id: str, db: AsyncIOMotorDatabase, use_cache: bool = True
+) -> PollMetadata | None:
+    """
+    Retrieves the immutable fields of a poll, from the in-process cache when possible.
+    Pass `use_cache=False` to force a fresh read, which also refreshes the cache.
+    """
+
+    if use_cache:
+        poll = poll_metadata_cache.get(poll_id)
+        if poll is not None:
+            return poll
+
+    poll_document = await db.polls.find_one({"poll_id": poll_id}, METADATA_PROJECTION)
+    if not poll_document:
+        # Missing polls aren't cached, the ID may get used by a new poll
+        poll_metadata_cache.invalidate(poll_id)
+        return None
+
+    poll = PollMetadata.model_validate(poll_document)
+    poll_metadata_cache.set(poll_id, poll)
+    return poll
+
+
+async def get_poll_votes(poll_id: str, db: AsyncIOMotorDatabase) -> PollVotesInDB | None:
+    """Retrieves only the vote counts of a poll."""
+
+    poll_document = await db.polls.find_one({"poll_id": poll_id}, VOTES_PROJECTION)
+    if poll_document:
+        # Vote counts are only ever written by this app, so they are trusted as they are
+        return PollVotesInDB.model_construct(**poll_document)
+    return None
@@ -1,84 +1,298 @@
+from collections import defaultdict
 from datetime import datetime, timezone
+import secrets
+from typing import Dict, List, Set
+import asyncio
 import logging
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from app.models import VoteCreate, PollInDB, PollResults
+from pymongo import ReturnDocument
+from app.config import settings
+from app.models import (
+    VoteCreate,
+    VoteBatchCreate,
+    BatchVoteResult,
+    PollMetadata,
+    PollVotesInDB,
+)
 from app.exceptions import (
+    PollAccessDeniedError,
     PollNotFoundError,
     PollClosedError,
     AlreadyVotedError,
     InvalidOptionsError,
 )
-from app.websocket_manager import manager
-from .poll_creation import _increment_global_stats
+from app.broadcast_scheduler import broadcast_scheduler
+from .poll_retrieval import get_poll_metadata, VOTES_PROJECTION
 from .security import verify_turnstile
+from .stats import stats_aggregator
+from .vote_buffer import vote_buffer
+from .vote_history import vote_history_recorder
+from .voter_store import (
+    reserve_voter,
+    release_voter,
+    release_voters,
+    has_voted,
+    insert_voters,
+    voter_record,
+    DUPLICATE_KEY_ERROR,
+)
 
 logger = logging.getLogger(__name__)
 
 
-async def add_vote(poll_id: str, vote_data: VoteCreate, db: AsyncIOMotorDatabase):
-    """
-    Applies a vote to a poll after performing all necessary validation.
-    Raises specific exceptions for different failure conditions.
-    """
+def _check_vote_allowed(poll: PollMetadata | None, option_ids: Set[str]):
+    """Raises the matching VotingError if a vote with these options can't be cast."""
 
-    # Fetch the poll
-    poll_doc = await db.polls.find_one({"poll_id": poll_id})
-    if not poll_doc:
+    if not poll:
         raise PollNotFoundError("This poll does not exist.")
 
-    poll = PollInDB.model_validate(poll_doc)
-
     # Check if poll is active
     active_until_aware = poll.active_until.replace(tzinfo=timezone.utc)
-    
     if datetime.now(timezone.utc) > active_until_aware:
         raise PollClosedError("This poll is no longer accepting votes.")
 
-    # Check if the voter is legit using turnstile
-    await verify_turnstile(vote_data.turnstile_token)
-
-    # Check for duplicate voter
-    if vote_data.voter_fingerprint in poll.voters:
-        raise AlreadyVotedError("This browser has already voted on this poll.")
-
     # Validate submitted option IDs
     valid_option_ids = {opt.id for opt in poll.options}
-    submitted_ids = set(vote_data.option_ids)
-
-    if not submitted_ids.issubset(valid_option_ids):
+    if not option_ids.issubset(valid_option_ids):
         raise InvalidOptionsError(
             "One or more submitted option IDs are invalid for this poll."
         )
 
     # Enforce multiple choice option
-    if not poll.allow_multiple_choices and len(submitted_ids) > 1:
+    if not poll.allow_multiple_choices and len(option_ids) > 1:
         raise InvalidOptionsError("This poll does not allow multiple choices.")
 
-    # If all checks pass, perform the database update ===
 
-    # Use $inc to increment counts for each submitted option
-    update_query = {"$inc": {f"votes.{opt_id}": 1 for opt_id in submitted_ids}}
+def _check_batch_allowed(poll: PollMetadata, creator_key: str | None, api_key: str | None):
+    """Raises PollAccessDeniedError unless a batch comes from the poll's creator or an integrator."""
+
+    # Compared as bytes, as `compare_digest` rejects strings with non-ASCII characters
+    if creator_key and secrets.compare_digest(creator_key.encode(), poll.creator_key.encode()):
+        return
+    if api_key:
+        api_keys = (key.strip() for key in settings.VOTE_BATCH_API_KEYS.split(","))
+        if any(key and secrets.compare_digest(api_key.encode(), key.encode()) for key in api_keys):
+            return
+    raise PollAccessDeniedError("Vote batches need the poll's creator key or an API key.")
+
 
-    # Use $push to add the voter fingerprint to the list of voters
-    update_query["$push"] = {"voters": vote_data.voter_fingerprint}
+async def _apply_vote_atomically(
+    poll_id: str, increments: Dict[str, int], db: AsyncIOMotorDatabase
+) -> PollVotesInDB | None:
+    """
+    Vote engine: increments the vote counts in a single `find_one_and_update`.
+    The active window is part of the filter, so a poll closing in between can't be voted on.
+    Returns the updated vote counts, or None if the poll closed or disappeared.
+    """
+
+    updated_poll_doc = await db.polls.find_one_and_update(
+        {"poll_id": poll_id, "active_until": {"$gt": datetime.now(timezone.utc)}},
+        # Use $inc to increment counts for each submitted option, and the sequence number once
+        {
+            "$inc": {
+                **{f"votes.{opt_id}": count for opt_id, count in increments.items()},
+                "seq": 1,
+            }
+        },
+        projection=VOTES_PROJECTION,
+        return_document=ReturnDocument.AFTER,
+    )
+    if updated_poll_doc is None:
+        return None
 
-    await db.polls.update_one({"poll_id": poll.poll_id}, update_query)
+    return PollVotesInDB.model_construct(**updated_poll_doc)
+
+
+def _abandon(task: asyncio.Task):
+    """Cancel a task whose result is no longer needed, without leaving its error unretrieved."""
+
+    task.cancel()
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+async def _buffer_vote(
+    poll: PollMetadata,
+    vote_data: VoteCreate,
+    option_ids: Set[str],
+    db: AsyncIOMotorDatabase,
+):
+    """
+    Write-behind variant of the vote path: accepts the vote into the vote buffer
+    instead of writing it. The duplicate check overlaps with Turnstile verification.
+    """
+
+    turnstile_task = asyncio.create_task(verify_turnstile(vote_data.turnstile_token))
+
+    try:
+        if await has_voted(poll.poll_id, vote_data.voter_fingerprint, db):
+            raise AlreadyVotedError("This browser has already voted on this poll.")
+    except BaseException:
+        _abandon(turnstile_task)
+        raise
+
+    await turnstile_task
+
+    # Raises AlreadyVotedError if the fingerprint is still waiting in the buffer
+    vote_buffer.add(poll.poll_id, vote_data.voter_fingerprint, option_ids, poll.expire_at)
+
+
+async def add_vote(poll_id: str, vote_data: VoteCreate, db: AsyncIOMotorDatabase):
+    """
+    Applies a vote to a poll after performing all necessary validation.
+    Raises specific exceptions for different failure conditions.
+
+    Cheap checks against the cached poll run first, so invalid votes never reach Cloudflare.
+    The Turnstile round trip then overlaps with reserving the voter's fingerprint.
+    """
+
+    # Validate against the cached poll metadata, usually without a database read
+    submitted_ids = set(vote_data.option_ids)
+    poll = await get_poll_metadata(poll_id, db)
+    _check_vote_allowed(poll, submitted_ids)
+
+    if settings.VOTE_WRITE_BEHIND:
+        await _buffer_vote(poll, vote_data, submitted_ids, db)
+        logger.info(
+            f"Vote buffered for poll '{poll_id}' by voter '{vote_data.voter_fingerprint[:8]}...'"
+        )
+        return
+
+    # Check if the voter is legit using turnstile, in the background
+    turnstile_task = asyncio.create_task(verify_turnstile(vote_data.turnstile_token))
+
+    # Check for duplicate voter, raises AlreadyVotedError
+    try:
+        await reserve_voter(poll_id, vote_data.voter_fingerprint, poll.expire_at, db)
+    except BaseException:
+        # The vote is rejected anyway, don't wait for Cloudflare
+        _abandon(turnstile_task)
+        raise
+
+    try:
+        await turnstile_task
+    except BaseException:
+        # Not a legit voter, the fingerprint may still vote with a valid token
+        await release_voter(poll_id, vote_data.voter_fingerprint, db)
+        raise
+
+    increments = {opt_id: 1 for opt_id in submitted_ids}
+    try:
+        new_votes = await _apply_vote_atomically(poll_id, increments, db)
+    except BaseException:
+        # Not counted, the fingerprint may vote again
+        await release_voter(poll_id, vote_data.voter_fingerprint, db)
+        raise
+    if new_votes is None:
+        # Lost a race with the poll closing or being deleted, give the fingerprint back
+        await release_voter(poll_id, vote_data.voter_fingerprint, db)
+        _check_vote_allowed(
+            await get_poll_metadata(poll_id, db, use_cache=False), submitted_ids
+        )
+        raise PollClosedError("This poll is no longer accepting votes.")
+
+    # Written in the background, like the stats
+    vote_history_recorder.add(poll_id, increments, poll.expire_at)
 
     # Implement global stat for total votes cast
-    await _increment_global_stats(db, "total_votes_cast")
-
-    updated_poll_doc = await db.polls.find_one({"poll_id": poll.poll_id})
-    if updated_poll_doc:
-
-        # Extract only the votes field to send through WebSocket
-        new_votes = updated_poll_doc.get("votes", {})
-        message = {
-            "votes": new_votes
-        }
-        await manager.broadcast(poll.poll_id, message)
-        
+    stats_aggregator.increment("total_votes_cast")
+
+    # Results are pushed to WebSocket clients by the scheduler, outside this request
+    broadcast_scheduler.mark_dirty(poll_id, new_votes)
+
     logger.info(
         f"Vote successfully cast for poll '{poll_id}' by voter '{vote_data.voter_fingerprint[:8]}...'"
     )
     return
+
+
+async def add_votes_batch(
+    poll_id: str,
+    batch: VoteBatchCreate,
+    db: AsyncIOMotorDatabase,
+    creator_key: str | None = None,
+    api_key: str | None = None,
+) -> List[BatchVoteResult]:
+    """
+    Applies many votes to one poll with a single Turnstile check and one poll fetch.
+    Fingerprints are recorded in one bulk insert and all counts in one update,
+    followed by a single results broadcast. Returns the outcome of every entry.
+    Raises PollNotFoundError or PollClosedError if the whole batch can't be applied,
+    and PollAccessDeniedError without the poll's `creator_key` or an integrator `api_key`.
+    """
+
+    poll = await get_poll_metadata(poll_id, db)
+    _check_vote_allowed(poll, set())
+    _check_batch_allowed(poll, creator_key, api_key)
+    await verify_turnstile(batch.turnstile_token)
+
+    results = [
+        BatchVoteResult(index=i, status="accepted") for i in range(len(batch.votes))
+    ]
+    candidates = []  # Indices of entries that passed the local checks
+    seen_fingerprints = set()
+
+    for i, entry in enumerate(batch.votes):
+        try:
+            _check_vote_allowed(poll, set(entry.option_ids))
+        except InvalidOptionsError as e:
+            results[i].status, results[i].detail = "invalid_options", str(e)
+            continue
+
+        if entry.voter_fingerprint in seen_fingerprints:
+            results[i].status = "already_voted"
+            results[i].detail = "This fingerprint appears more than once in the batch."
+            continue
+
+        seen_fingerprints.add(entry.voter_fingerprint)
+        candidates.append(i)
+
+    if not candidates:
+        return results
+
+    # Record every fingerprint at once, the unique index rejects previous voters
+    errors = await insert_voters(
+        [
+            voter_record(poll_id, batch.votes[i].voter_fingerprint, poll.expire_at)
+            for i in candidates
+        ],
+        db,
+    )
+
+    accepted = []
+    increments: Dict[str, int] = defaultdict(int)
+    for position, i in enumerate(candidates):
+        if errors.get(position) == DUPLICATE_KEY_ERROR:
+            results[i].status = "already_voted"
+            results[i].detail = "This browser has already voted on this poll."
+            continue
+        if position in errors:
+            results[i].status = "failed"
+            results[i].detail = "This vote could not be recorded, it can be retried."
+            continue
+
+        accepted.append(batch.votes[i].voter_fingerprint)
+        for opt_id in set(batch.votes[i].option_ids):
+            increments[opt_id] += 1
+
+    if not accepted:
+        return results
+
+    try:
+        new_votes = await _apply_vote_atomically(poll_id, increments, db)
+    except BaseException:
+        # None of the batch was counted, so its voters may retry
+        await release_voters(poll_id, accepted, db)
+        raise
+    if new_votes is None:
+        # The poll closed or was deleted meanwhile, none of the batch counts
+        await release_voters(poll_id, accepted, db)
+        _check_vote_allowed(await get_poll_metadata(poll_id, db, use_cache=False), set())
+        raise PollClosedError("This poll is no longer accepting votes.")
+
+    vote_history_recorder.add(poll_id, increments, poll.expire_at)
+    stats_aggregator.increment("total_votes_cast", len(accepted))
+    broadcast_scheduler.mark_dirty(poll_id, new_votes)
+
+    logger.info(f"Batch of {len(accepted)} vote(s) cast for poll '{poll_id}'")
+    return results
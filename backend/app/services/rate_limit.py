@@ -0,0 +1,189 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Tuple
+
+from fastapi import HTTPException, Request, status
+from pymongo import ReturnDocument
+
+from app.config import settings
+from app.database import get_database
+from app.metrics import rate_limited_requests
+from app.models import VoteCreate
+
+
+class RateLimitStore(ABC):
+    """Base class for the storage behind rate limits."""
+
+    @abstractmethod
+    async def hit(self, key: str, per_second: float, burst: int) -> float:
+        """
+        Take one request's worth of allowance for a key.
+        Returns 0 if the request is allowed, or the seconds until it would be.
+        """
+
+    def clear(self):
+        """Forget this worker's state, e.g. between tests."""
+        pass
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """Token buckets in this worker's memory.
+
+       - A bucket holds up to `burst` tokens and refills at `per_second`
+       - Holds at most `maxsize` buckets, the least recently used one is dropped
+         first. A dropped bucket starts over full, so the bound costs a little accuracy
+       - Each worker limits on its own, use the Mongo store to share the limits
+    """
+
+    def __init__(self, maxsize: int = settings.RATE_LIMIT_MAX_KEYS):
+        self.maxsize = maxsize
+        # Key: limit and client key, Value: (tokens left, monotonic time of the last update)
+        self._buckets: OrderedDict[str, Tuple[float, float]] = OrderedDict()
+
+    async def hit(self, key: str, per_second: float, burst: int) -> float:
+        now = time.monotonic()
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = burst
+        else:
+            tokens, updated = bucket
+            tokens = min(burst, tokens + (now - updated) * per_second)
+            self._buckets.move_to_end(key)
+
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / per_second
+
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        self._buckets.clear()
+
+
+class MongoRateLimitStore(RateLimitStore):
+    """Counters shared by all workers, in the `rate_limits` collection.
+
+       - Counts requests in fixed windows of `burst / per_second` seconds with one
+         upserted `$inc`, which is cheaper to keep consistent than a shared token bucket
+       - Same average rate as the in-memory buckets, but a burst may reach twice
+         the size where two windows meet
+       - Counters expire with their window through a TTL index
+    """
+
+    async def hit(self, key: str, per_second: float, burst: int) -> float:
+        window = burst / per_second
+        now = time.time()
+        window_end = (math.floor(now / window) + 1) * window
+
+        counter = await get_database().rate_limits.find_one_and_update(
+            {"_id": f"{key}:{int(window_end)}"},
+            {
+                "$inc": {"n": 1},
+                # Kept a little past the window, TTL deletion isn't instant anyway
+                "$setOnInsert": {
+                    "expire_at": datetime.fromtimestamp(window_end, timezone.utc)
+                    + timedelta(seconds=60)
+                },
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        if counter["n"] <= burst:
+            return 0.0
+        return window_end - now
+
+
+RATE_LIMIT_BACKENDS = {
+    "memory": InMemoryRateLimitStore,
+    "mongo": MongoRateLimitStore,
+}
+
+
+def create_rate_limit_store(name: str = settings.RATE_LIMIT_BACKEND) -> RateLimitStore:
+    """Build the store selected by the `RATE_LIMIT_BACKEND` setting."""
+
+    try:
+        return RATE_LIMIT_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown rate limit backend '{name}', expected one of: {', '.join(RATE_LIMIT_BACKENDS)}"
+        )
+
+
+# Global store instance
+rate_limit_store = create_rate_limit_store()
+
+
+class RateLimit:
+    """A named limit of `per_minute` requests on average, with bursts of up to `burst`."""
+
+    def __init__(self, name: str, per_minute: float, burst: int):
+        self.name = name
+        self.per_second = per_minute / 60
+        self.burst = burst
+
+    async def check(self, key: str):
+        """Raises a 429 HTTPException with `Retry-After` if the key is over the limit."""
+
+        wait = await rate_limit_store.hit(f"{self.name}:{key}", self.per_second, self.burst)
+        if wait > 0:
+            rate_limited_requests.inc(self.name)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please slow down.",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+
+poll_creation_limit = RateLimit(
+    "create_ip", settings.RATE_LIMIT_CREATE_PER_MINUTE, settings.RATE_LIMIT_CREATE_BURST
+)
+vote_ip_limit = RateLimit(
+    "vote_ip", settings.RATE_LIMIT_VOTE_PER_MINUTE, settings.RATE_LIMIT_VOTE_BURST
+)
+vote_batch_limit = RateLimit(
+    "vote_batch_ip", settings.RATE_LIMIT_BATCH_PER_MINUTE, settings.RATE_LIMIT_BATCH_BURST
+)
+vote_fingerprint_limit = RateLimit(
+    "vote_fingerprint",
+    settings.RATE_LIMIT_FINGERPRINT_PER_MINUTE,
+    settings.RATE_LIMIT_FINGERPRINT_BURST,
+)
+
+
+def client_ip(request: Request) -> str:
+    """
+    The client's address, as rewritten by uvicorn's `--proxy-headers` behind a proxy.
+    Only proxies listed in `FORWARDED_ALLOW_IPS` are trusted, otherwise this is the proxy's IP.
+    """
+
+    return request.client.host if request.client else "unknown"
+
+
+# FastAPI dependencies, they run before the endpoints touch Mongo or Turnstile ===
+
+
+async def limit_poll_creation(request: Request):
+    if settings.RATE_LIMIT_ENABLED:
+        await poll_creation_limit.check(client_ip(request))
+
+
+async def limit_vote_batches(request: Request):
+    if settings.RATE_LIMIT_ENABLED:
+        await vote_batch_limit.check(client_ip(request))
+
+
+async def limit_votes(request: Request, vote_data: VoteCreate):
+    # Shares the already parsed body with the endpoint
+    if settings.RATE_LIMIT_ENABLED:
+        await vote_ip_limit.check(client_ip(request))
+        await vote_fingerprint_limit.check(vote_data.voter_fingerprint.lower())
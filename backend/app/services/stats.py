@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from typing import Dict
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.config import settings
+from app.database import get_database
+
+logger = logging.getLogger(__name__)
+
+# Prefix of the counter documents in the 'stats' collection.
+# The plain "global_counters" document from before sharding is still counted.
+COUNTER_ID_PREFIX = "global_counters"
+
+
+class StatsAggregator:
+    """Buffers global counter increments in memory instead of writing one per request.
+
+       - `increment` only touches a local dict
+       - A background task flushes everything with a single `$inc` every interval
+       - Each worker writes to one of several shard documents, so workers don't
+         contend on a single record. Totals are the sum over all shards
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = settings.STATS_FLUSH_INTERVAL_SECONDS,
+        shards: int = settings.STATS_COUNTER_SHARDS,
+    ):
+        self.flush_interval = flush_interval
+        self.shard_id = f"{COUNTER_ID_PREFIX}:{os.getpid() % shards}"
+        self._pending: Dict[str, int] = defaultdict(int)
+        self._task: asyncio.Task | None = None
+
+        # Cached result of the last totals read: (expiry timestamp, totals)
+        self._totals_cache: tuple[float, Dict[str, int]] | None = None
+
+    def increment(self, field: str, amount: int = 1):
+        self._pending[field] += amount
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Stop the background task and write out whatever is still buffered.
+        A failed final write is logged, so that it doesn't hold up the rest of the shutdown.
+        """
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        try:
+            await self.flush()
+        except Exception:
+            logger.error(f"Lost global stats on shutdown: {dict(self._pending)}", exc_info=True)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.error("Failed to flush global stats", exc_info=True)
+
+    async def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, defaultdict(int)
+
+        try:
+            await get_database().stats.update_one(
+                {"_id": self.shard_id},
+                {"$inc": dict(pending)},
+                upsert=True,  # Create the document if it doesn't exist
+            )
+        except Exception:
+            # Keep the increments for the next attempt
+            for field, amount in pending.items():
+                self._pending[field] += amount
+            raise
+
+    async def get_totals(self, db: AsyncIOMotorDatabase) -> Dict[str, int]:
+        """Sum the counters over all shard documents, cached for a short while."""
+
+        now = time.monotonic()
+        if self._totals_cache is not None and now < self._totals_cache[0]:
+            return self._totals_cache[1]
+
+        totals: Dict[str, int] = defaultdict(int)
+        cursor = db.stats.find({"_id": {"$regex": f"^{COUNTER_ID_PREFIX}"}})
+        async for counter_doc in cursor:
+            for field, value in counter_doc.items():
+                if field != "_id":
+                    totals[field] += value
+
+        self._totals_cache = (now + settings.STATS_CACHE_TTL_SECONDS, dict(totals))
+        return self._totals_cache[1]
+
+
+# Global StatsAggregator instance
+stats_aggregator = StatsAggregator()
@@ -0,0 +1,236 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Set, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.broadcast_scheduler import broadcast_scheduler
+from app.config import settings
+from app.database import get_database
+from app.exceptions import AlreadyVotedError, VoteBufferFullError
+from .stats import stats_aggregator
+from .vote_history import vote_history_recorder
+from .voter_store import voter_record, insert_voters, DUPLICATE_KEY_ERROR
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedVote:
+    """A vote accepted into the buffer but not written yet."""
+
+    __slots__ = ("poll_id", "voter_fingerprint", "option_ids", "expire_at", "maybe_recorded")
+
+    def __init__(
+        self, poll_id: str, voter_fingerprint: str, option_ids: Set[str], expire_at: datetime
+    ):
+        self.poll_id = poll_id
+        self.voter_fingerprint = voter_fingerprint
+        self.option_ids = option_ids
+        self.expire_at = expire_at
+        # Set when an insert of its voter failed without saying whether it was applied
+        self.maybe_recorded = False
+
+
+class VoteBuffer:
+    """Write-behind accumulator for polls receiving more votes than one write each can keep up with.
+
+       - Accepted votes are kept in memory per poll, a fingerprint can only be buffered once
+       - Every few milliseconds, or once enough votes are waiting, the buffer is written
+         with one `insert_many` into the voter store and one `bulk_write` of combined `$inc`s
+       - Fingerprints rejected by the voter store's unique index (e.g. the same voter
+         on another worker) are dropped before counting, so dedup still holds
+       - At most one flush interval of votes is lost if the process dies, the buffer
+         is always flushed on a normal shutdown
+       - Holds at most `max_pending` votes, more are refused while writes keep failing
+    """
+
+    def __init__(
+        self,
+        flush_interval_ms: int = settings.VOTE_FLUSH_INTERVAL_MS,
+        max_batch: int = settings.VOTE_FLUSH_MAX_BATCH,
+        max_pending: int = settings.VOTE_BUFFER_MAX_PENDING,
+    ):
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+
+        # Key: poll_id (str), Value: Buffered votes keyed by voter fingerprint
+        self._votes: Dict[str, Dict[str, BufferedVote]] = defaultdict(dict)
+        self._size = 0
+
+        # Counts whose voters are recorded but which failed to be written, retried next flush.
+        # Bounded by the number of polls, as each poll's counts are merged
+        # Key: poll_id (str), Value: option_id -> increment
+        self._unapplied: Dict[str, Dict[str, int]] = {}
+        # Key: poll_id (str), Value: expiry of the poll, for its vote history
+        self._expire_at: Dict[str, datetime] = {}
+
+        self._full = asyncio.Event()
+        self._stopping = False
+        self._task: asyncio.Task | None = None
+
+    def add(self, poll_id: str, voter_fingerprint: str, option_ids: Set[str], expire_at: datetime):
+        """
+        Accept a validated vote into the buffer. Raises AlreadyVotedError for a buffered voter,
+        and VoteBufferFullError if too many votes are already waiting to be written.
+        """
+
+        poll_votes = self._votes[poll_id]
+        if voter_fingerprint in poll_votes:
+            raise AlreadyVotedError("This browser has already voted on this poll.")
+        if self._size >= self.max_pending:
+            raise VoteBufferFullError("Votes can't be recorded right now, please retry shortly.")
+
+        poll_votes[voter_fingerprint] = BufferedVote(
+            poll_id, voter_fingerprint, option_ids, expire_at
+        )
+        self._size += 1
+        if self._size >= self.max_batch:
+            self._full.set()
+
+    async def start(self):
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Let the background task finish its current flush, then write out everything left."""
+
+        if self._task is not None:
+            # Not cancelled, a flush interrupted halfway would lose its votes
+            self._stopping = True
+            self._full.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+
+            try:
+                await self.flush()
+            except Exception:
+                logger.error("Failed to flush buffered votes", exc_info=True)
+
+    async def flush(self):
+        """Write all buffered votes in one batch per collection."""
+
+        db = get_database()
+        if self._size:
+            batch = [vote for poll_votes in self._votes.values() for vote in poll_votes.values()]
+            self._votes, self._size = defaultdict(dict), 0
+
+            try:
+                recorded, failed = await self._record_voters(batch)
+            except Exception:
+                # Nothing was counted yet, keep the whole batch for the next attempt.
+                # The server may still have stored the voters, e.g. on a timeout
+                for vote in batch:
+                    vote.maybe_recorded = True
+                self._requeue(batch)
+                raise
+            self._requeue(failed)
+
+            for vote in recorded:
+                increments = self._unapplied.setdefault(vote.poll_id, defaultdict(int))
+                self._expire_at[vote.poll_id] = vote.expire_at
+                for opt_id in vote.option_ids:
+                    increments[opt_id] += 1
+            stats_aggregator.increment("total_votes_cast", len(recorded))
+
+        if not self._unapplied:
+            return
+
+        unapplied, self._unapplied = self._unapplied, {}
+        poll_ids = list(unapplied)
+        try:
+            await db.polls.bulk_write(
+                [
+                    UpdateOne(
+                        {"poll_id": poll_id},
+                        {
+                            "$inc": {
+                                **{f"votes.{opt_id}": count for opt_id, count in increments.items()},
+                                "seq": 1,
+                            }
+                        },
+                    )
+                    for poll_id, increments in unapplied.items()
+                ],
+                ordered=False,
+            )
+        except BulkWriteError as e:
+            # The other updates were applied, retrying them would count their votes twice
+            failed = {poll_ids[error["index"]] for error in e.details["writeErrors"]}
+            self._merge_unapplied({poll_id: unapplied.pop(poll_id) for poll_id in failed})
+            logger.error(f"Failed to apply the buffered votes of {len(failed)} poll(s)")
+        except Exception:
+            # Nothing was acknowledged. Voters are already recorded, so only the counts are retried
+            self._merge_unapplied(unapplied)
+            raise
+
+        for poll_id, increments in unapplied.items():
+            vote_history_recorder.add(poll_id, increments, self._expire_at.pop(poll_id))
+            broadcast_scheduler.mark_dirty(poll_id)
+
+    async def _record_voters(
+        self, batch: List[BufferedVote]
+    ) -> Tuple[List[BufferedVote], List[BufferedVote]]:
+        """
+        Insert the batch's fingerprints into the voter store.
+        Returns the votes whose voter got recorded, and the ones that failed for
+        reasons other than a duplicate and should be retried.
+
+        A duplicate of a vote whose earlier insert may have been applied
+        is most likely that insert, so it counts as recorded.
+        """
+
+        errors = await insert_voters(
+            [voter_record(v.poll_id, v.voter_fingerprint, v.expire_at) for v in batch],
+            get_database(),
+        )
+        if not errors:
+            return batch, []
+
+        recorded = [
+            vote
+            for i, vote in enumerate(batch)
+            if i not in errors or (vote.maybe_recorded and errors[i] == DUPLICATE_KEY_ERROR)
+        ]
+        duplicates = sum(
+            1
+            for i, code in errors.items()
+            if code == DUPLICATE_KEY_ERROR and not batch[i].maybe_recorded
+        )
+        if duplicates:
+            logger.info(f"Dropped {duplicates} duplicate buffered vote(s)")
+
+        failed = [
+            vote
+            for i, vote in enumerate(batch)
+            if errors.get(i, DUPLICATE_KEY_ERROR) != DUPLICATE_KEY_ERROR
+        ]
+        return recorded, failed
+
+    def _requeue(self, votes: List[BufferedVote]):
+        for vote in votes:
+            if vote.voter_fingerprint not in self._votes[vote.poll_id]:
+                self._votes[vote.poll_id][vote.voter_fingerprint] = vote
+                self._size += 1
+
+    def _merge_unapplied(self, unapplied: Dict[str, Dict[str, int]]):
+        for poll_id, increments in unapplied.items():
+            merged = self._unapplied.setdefault(poll_id, defaultdict(int))
+            for opt_id, count in increments.items():
+                merged[opt_id] += count
+
+
+# Global VoteBuffer instance
+vote_buffer = VoteBuffer()
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from app.config import settings
+from app.database import get_database
+from app.models import PollVoteHistory
+
+logger = logging.getLogger(__name__)
+
+BUCKET_PROJECTION = {"_id": 0, "start": 1, "votes": 1}
+
+
+def bucket_start(at: datetime, bucket_seconds: int = settings.VOTE_BUCKET_SECONDS) -> datetime:
+    """The start of the time bucket that `at` falls into."""
+
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)  # Assume UTC
+    timestamp = at.timestamp()
+    return datetime.fromtimestamp(timestamp - timestamp % bucket_seconds, timezone.utc)
+
+
+def bucket_update(
+    poll_id: str, increments: Dict[str, int], expire_at: datetime, at: datetime
+) -> UpdateOne:
+    """Upsert adding vote counts to the poll's bucket for the time `at`."""
+
+    return UpdateOne(
+        {"poll_id": poll_id, "start": bucket_start(at)},
+        {
+            "$inc": {f"votes.{opt_id}": count for opt_id, count in increments.items()},
+            # Buckets expire together with their poll
+            "$setOnInsert": {"expire_at": expire_at},
+        },
+        upsert=True,
+    )
+
+
+class VoteHistoryRecorder:
+    """Buffers vote history increments in memory, off the vote's request path.
+
+       - `add` only touches a local dict, keyed by poll and bucket, when a vote is written
+       - A background task upserts every touched bucket with one `bulk_write` each interval
+       - The history only feeds charts, so a failed write is logged and dropped rather
+         than retried, which keeps memory bounded while MongoDB is unreachable
+    """
+
+    def __init__(self, flush_interval: float = settings.VOTE_HISTORY_FLUSH_INTERVAL_SECONDS):
+        self.flush_interval = flush_interval
+        # Key: (poll_id, bucket start), Value: option_id -> increment
+        self._pending: Dict[Tuple[str, datetime], Dict[str, int]] = {}
+        # Key: poll_id (str), Value: expiry of the poll, which its buckets share
+        self._expire_at: Dict[str, datetime] = {}
+        self._task: asyncio.Task | None = None
+
+    def add(self, poll_id: str, increments: Dict[str, int], expire_at: datetime):
+        """Count applied votes in the poll's bucket for the current time."""
+
+        key = (poll_id, bucket_start(datetime.now(timezone.utc)))
+        pending = self._pending.setdefault(key, defaultdict(int))
+        for opt_id, count in increments.items():
+            pending[opt_id] += count
+        self._expire_at[poll_id] = expire_at
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task and write out whatever is still buffered."""
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self, db: AsyncIOMotorDatabase | None = None):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        expire_at, self._expire_at = self._expire_at, {}
+
+        try:
+            await (db if db is not None else get_database()).poll_vote_buckets.bulk_write(
+                [
+                    bucket_update(poll_id, increments, expire_at[poll_id], start)
+                    for (poll_id, start), increments in pending.items()
+                ],
+                ordered=False,
+            )
+        except Exception:
+            logger.error(
+                f"Failed to record {len(pending)} vote history bucket(s)", exc_info=True
+            )
+
+
+# Global VoteHistoryRecorder instance
+vote_history_recorder = VoteHistoryRecorder()
+
+
+async def get_vote_history(
+    poll_id: str,
+    db: AsyncIOMotorDatabase,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    limit: int = settings.VOTE_HISTORY_MAX_BUCKETS,
+) -> PollVoteHistory:
+    """
+    Retrieves a poll's vote buckets between `start` (inclusive) and `end` (exclusive), oldest first.
+    Buckets without any votes aren't stored, so the series only has the busy ones.
+
+    Returns at most `limit` buckets. If there may be more, `next_start` is where to continue.
+    """
+
+    query: dict = {"poll_id": poll_id}
+    time_range = {}
+    if start is not None:
+        time_range["$gte"] = bucket_start(start)
+    if end is not None:
+        time_range["$lt"] = end
+    if time_range:
+        query["start"] = time_range
+
+    documents = (
+        await db.poll_vote_buckets.find(query, BUCKET_PROJECTION)
+        .sort("start", 1)
+        .limit(limit)
+        .to_list(length=limit)
+    )
+    history = PollVoteHistory.model_validate(
+        {"poll_id": poll_id, "bucket_seconds": settings.VOTE_BUCKET_SECONDS, "buckets": documents}
+    )
+    if len(documents) == limit:
+        last_start = history.buckets[-1].start
+        history.next_start = last_start + timedelta(seconds=settings.VOTE_BUCKET_SECONDS)
+    return history
+
+
+async def delete_vote_history(poll_id: str, db: AsyncIOMotorDatabase):
+    """Removes every bucket of a poll, so a reused poll ID starts clean."""
+
+    await db.poll_vote_buckets.delete_many({"poll_id": poll_id})
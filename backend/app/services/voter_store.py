@@ -0,0 +1,97 @@
+from datetime import datetime
+from typing import Dict, List
+
+from bson import Binary
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from app.exceptions import AlreadyVotedError
+
+# Error code of a unique index violation inside a BulkWriteError
+DUPLICATE_KEY_ERROR = 11000
+
+
+def fingerprint_to_binary(voter_fingerprint: str) -> Binary:
+    """Packs a 32 character hex fingerprint into 16 bytes of BSON binary."""
+
+    return Binary(bytes.fromhex(voter_fingerprint))
+
+
+def voter_record(poll_id: str, voter_fingerprint: str, expire_at: datetime) -> dict:
+    """Builds the `poll_voters` document for a fingerprint."""
+
+    return {
+        "poll_id": poll_id,
+        "fp": fingerprint_to_binary(voter_fingerprint),
+        "expire_at": expire_at,  # Removed by the TTL index along with the poll
+    }
+
+
+async def reserve_voter(
+    poll_id: str, voter_fingerprint: str, expire_at: datetime, db: AsyncIOMotorDatabase
+):
+    """
+    Records that a fingerprint voted on a poll.
+    The unique (poll_id, fp) index makes this the atomic duplicate check,
+    raises AlreadyVotedError if the fingerprint is already recorded.
+    """
+
+    try:
+        await db.poll_voters.insert_one(
+            voter_record(poll_id, voter_fingerprint, expire_at)
+        )
+    except DuplicateKeyError:
+        raise AlreadyVotedError("This browser has already voted on this poll.")
+
+
+async def insert_voters(records: List[dict], db: AsyncIOMotorDatabase) -> Dict[int, int]:
+    """
+    Inserts many voter records in one unordered batch.
+    Returns the error code of every record that wasn't inserted, keyed by its index
+    (DUPLICATE_KEY_ERROR for fingerprints that already voted).
+    """
+
+    try:
+        await db.poll_voters.insert_many(records, ordered=False)
+    except BulkWriteError as e:
+        return {error["index"]: error["code"] for error in e.details["writeErrors"]}
+    return {}
+
+
+async def has_voted(
+    poll_id: str, voter_fingerprint: str, db: AsyncIOMotorDatabase
+) -> bool:
+    """Checks for a recorded fingerprint, answered from the unique index alone."""
+
+    voter = await db.poll_voters.find_one(
+        {"poll_id": poll_id, "fp": fingerprint_to_binary(voter_fingerprint)},
+        {"_id": 0, "poll_id": 1},
+    )
+    return voter is not None
+
+
+async def release_voter(poll_id: str, voter_fingerprint: str, db: AsyncIOMotorDatabase):
+    """Removes a fingerprint record, for votes that failed after being reserved."""
+
+    await db.poll_voters.delete_one(
+        {"poll_id": poll_id, "fp": fingerprint_to_binary(voter_fingerprint)}
+    )
+
+
+async def release_voters(
+    poll_id: str, voter_fingerprints: List[str], db: AsyncIOMotorDatabase
+):
+    """Removes several fingerprint records of one poll at once."""
+
+    await db.poll_voters.delete_many(
+        {
+            "poll_id": poll_id,
+            "fp": {"$in": [fingerprint_to_binary(fp) for fp in voter_fingerprints]},
+        }
+    )
+
+
+async def delete_poll_voters(poll_id: str, db: AsyncIOMotorDatabase):
+    """Removes every fingerprint recorded for a poll, so a reused poll ID starts clean."""
+
+    await db.poll_voters.delete_many({"poll_id": poll_id})
@@ -0,0 +1,73 @@
+import asyncio
+from functools import lru_cache
+from typing import AsyncIterator
+
+import orjson
+
+from app.config import settings
+
+
+@lru_cache(maxsize=1024)
+def encode_event(frame: str) -> str:
+    """
+    Format a results frame as a Server-Sent Event, with its sequence number as the event ID.
+    Every client of a poll is handed the same frame object, so each frame is formatted once.
+    """
+
+    message = orjson.loads(frame)
+    return f"id: {message['seq']}\nevent: {message['type']}\ndata: {frame}\n\n"
+
+
+def parse_event_id(value: str | None) -> int | None:
+    """
+    The sequence number in a `Last-Event-ID` header, or None when it isn't one of ours.
+    Proxies and other SSE servers can send arbitrary IDs, which get a fresh snapshot instead.
+    """
+
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class EventStreamConnection:
+    """Adapter that lets the ConnectionManager fan out to an SSE response like to a WebSocket.
+
+       - The manager's writer task calls `send_text` as for any other client,
+         so SSE viewers get the same queueing, timeouts and eviction
+       - `events` is the response body, it yields what was sent and a comment
+         now and then so that idle connections aren't cut by proxies
+    """
+
+    def __init__(self):
+        # A single slot, so `send_text` waits for the response to take the previous event
+        self._outbox: asyncio.Queue[str | None] = asyncio.Queue(maxsize=1)
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        await self._outbox.put(encode_event(data))
+
+    async def close(self, code: int = 1000, reason: str | None = None):
+        # Ends the response, the browser reconnects by itself with `Last-Event-ID`
+        if self._outbox.full():
+            self._outbox.get_nowait()
+        self._outbox.put_nowait(None)
+
+    async def events(self) -> AsyncIterator[str]:
+        # Reconnect after the same delay as the frontend's WebSocket client
+        yield "retry: 3000\n\n"
+
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    self._outbox.get(), timeout=settings.SSE_KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+
+            if event is None:
+                return
+            yield event
@@ -1,53 +1,352 @@
 import asyncio
-from typing import Dict, List
-from fastapi import WebSocket
+import heapq
+import logging
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Set
+
+import orjson
+from fastapi import WebSocket, status
+
+from app.backplane import Backplane, create_backplane
+from app.config import settings
+from app.exceptions import ConnectionLimitError
+from app.metrics import broadcast_duration, broadcast_fanout, registry, CallbackMetric
+from app.models import PollVotesInDB
+from app.results_stream import PollStream, delta_frame
+
+logger = logging.getLogger(__name__)
+
+
+class ClientConnection:
+    """A connected client along with its own bounded outbound queue and writer task."""
+
+    __slots__ = ("websocket", "client_key", "queue", "dropped_updates", "writer")
+
+    def __init__(self, websocket: WebSocket, queue_size: int, client_key: str | None = None):
+        self.websocket = websocket
+        self.client_key = client_key  # Usually the client's IP, for the per-client limit
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self.dropped_updates = 0  # Consecutive updates replaced before being sent
+        self.writer: asyncio.Task | None = None
 
 
 class ConnectionManager:
     """In-memory manager for Websocket connection objects and related tasks.
 
-       - Stores a list of connected websocket objects for each poll
+       - Stores a list of connected clients for each poll
          *for each poll that has at least one client listening
-       - Handles adding and removing websocket objects for dis/connects
-       - Forwards message to all clients concurrently when broadcast function is called 
+         *clients are WebSockets, or adapters with the same methods (see `app.sse`)
+       - Handles adding and removing clients for dis/connects
+       - Encodes each broadcast once and publishes it through a backplane,
+         so that every worker forwards the same frame to its own clients
+       - Every client has its own queue and writer task, so a broadcast never
+         waits on a slow socket. Clients that keep falling behind are evicted
+       - Broadcasts are sequenced snapshots. Clients get a snapshot when they
+         connect and only the changed counts after that
+       - Admits connections only within the worker, poll and client limits,
+         and spreads the fan-out to big polls over several event loop turns
     """
 
-    def __init__(self):
+    def __init__(self, backplane: Backplane | None = None):
         # This dictionary will hold active connections for each poll
-        # Key: poll_id (str), Value: List of active WebSocket connections
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+        # Key: poll_id (str), Value: Connected clients keyed by their socket, for O(1) removal
+        self.active_connections: Dict[str, Dict[Any, ClientConnection]] = {}
+        self._count = 0
+        # Key: client key (usually the IP), Value: Number of open connections
+        self._per_client: Dict[str, int] = defaultdict(int)
+        # Versioned results of every poll that has clients on this worker
+        self.streams: Dict[str, PollStream] = {}
+
+        self.backplane = backplane or create_backplane()
+        self.backplane.set_handler(self.broadcast_local)
+
+        # Number of clients disconnected for not keeping up with updates
+        self.evicted_slow_consumers = 0
+        # Number of connections refused for being over a limit
+        self.rejected_connections = 0
+        # Closes of evicted clients still in progress, referenced so they aren't collected
+        self._closing: Set[asyncio.Task] = set()
+
+    async def start(self):
+        """Start listening for broadcasts published by any worker."""
+
+        await self.backplane.start()
+
+    async def stop(self):
+        await self.backplane.stop()
+
+        for task in self._closing:
+            task.cancel()
+        await asyncio.gather(*self._closing, return_exceptions=True)
 
-    async def connect(self, poll_id: str, websocket: WebSocket):
-        """Accept a new WebSocket connection and add it to the poll's list."""
+    def is_streaming(self, poll_id: str) -> bool:
+        """Whether this worker already tracks the poll's results, so a new client needs no read."""
 
-        await websocket.accept()
-        if poll_id not in self.active_connections:
-            self.active_connections[poll_id] = []
-        self.active_connections[poll_id].append(websocket)
+        return poll_id in self.streams
+
+    def check_admission(self, poll_id: str, client_key: str | None = None):
+        """Raise ConnectionLimitError if one more connection would exceed a limit."""
+
+        limits = (
+            (settings.WS_MAX_CONNECTIONS, self._count, "This server has too many connections"),
+            (
+                settings.WS_MAX_CONNECTIONS_PER_POLL,
+                len(self.active_connections.get(poll_id, ())),
+                "This poll has too many viewers",
+            ),
+            (
+                settings.WS_MAX_CONNECTIONS_PER_CLIENT,
+                self._per_client.get(client_key, 0) if client_key else 0,
+                "Too many connections from this client",
+            ),
+        )
+        for limit, current, reason in limits:
+            if limit and current >= limit:
+                self.rejected_connections += 1
+                raise ConnectionLimitError(reason)
+
+    async def connect(
+        self,
+        poll_id: str,
+        websocket: WebSocket,
+        since: int | None = None,
+        current: PollVotesInDB | None = None,
+        client_key: str | None = None,
+    ):
+        """
+        Accept a new WebSocket connection and add it to the poll's clients.
+        Raises ConnectionLimitError, before accepting, if a limit has been reached.
+
+        The client is first sent what it's missing since sequence `since`, or a full
+        snapshot. `current` seeds the poll's results if this worker doesn't track them yet.
+        """
+
+        self.check_admission(poll_id, client_key)
+
+        # Registered before accepting, so that concurrent connects count against the limits
+        client = ClientConnection(websocket, settings.WS_SEND_QUEUE_SIZE, client_key)
+        stream = self.streams.get(poll_id)
+        if stream is None:
+            current = current or PollVotesInDB(poll_id=poll_id)
+            stream = self.streams[poll_id] = PollStream(
+                current.seq, current.votes, settings.WS_DELTA_HISTORY
+            )
+
+        self.active_connections.setdefault(poll_id, {})[websocket] = client
+        self._count += 1
+        if client_key:
+            self._per_client[client_key] += 1
+
+        # Queued first, ahead of any delta broadcast while accepting
+        frame = stream.catch_up(since)
+        if frame is not None:
+            client.queue.put_nowait(frame)
+
+        try:
+            await websocket.accept()
+        except BaseException:
+            self._remove(poll_id, client)
+            raise
+        client.writer = asyncio.create_task(self._write(poll_id, client))
 
     def disconnect(self, poll_id: str, websocket: WebSocket):
-        """Remove a WebSocket connection from the list."""
+        """Remove a WebSocket connection from its poll."""
+
+        client = self.active_connections.get(poll_id, {}).get(websocket)
+        if client is not None:
+            self._remove(poll_id, client)
+
+    def _remove(self, poll_id: str, client: ClientConnection):
+        """Forget a client and stop its writer. Safe to call more than once."""
+
+        clients = self.active_connections.get(poll_id)
+        if clients is None or clients.get(client.websocket) is not client:
+            return
+
+        del clients[client.websocket]
+        self._count -= 1
+        if client.client_key:
+            self._per_client[client.client_key] -= 1
+            if not self._per_client[client.client_key]:
+                del self._per_client[client.client_key]
 
-        if poll_id in self.active_connections:
-            self.active_connections[poll_id].remove(websocket)
+        # If a poll has no more listeners, we can remove the entry
+        if not clients:
+            del self.active_connections[poll_id]
+            self.streams.pop(poll_id, None)
 
-            # If a poll has no more listeners, we can remove the entry
-            if not self.active_connections[poll_id]:
-                del self.active_connections[poll_id]
+        if client.writer is not None and client.writer is not asyncio.current_task():
+            client.writer.cancel()
 
     async def broadcast(self, poll_id: str, message: dict):
-        """Send a JSON message to all connected clients for a specific poll."""
+        """
+        Publish a poll's results once, to be delivered by every worker.
+        The message is a full snapshot, `{"seq": ..., "votes": {...}}`.
+        """
 
-        if poll_id in self.active_connections:
-            # We create a list of tasks for sending the message
-            tasks = [
-                connection.send_json(message)
-                for connection in self.active_connections[poll_id]
-            ]
+        # Serialize a single time, no matter how many clients are listening
+        await self.broadcast_raw(poll_id, orjson.dumps(message))
 
-            # Run all send tasks concurrently
-            await asyncio.gather(*tasks, return_exceptions=False)
+    async def broadcast_raw(self, poll_id: str, data: bytes):
+        """Publish an already JSON-encoded snapshot for a poll."""
+
+        await self.backplane.publish(poll_id, data)
+
+    async def broadcast_local(self, poll_id: str, data: bytes):
+        """Queue the changes in a published snapshot for the clients connected to this worker."""
+
+        if poll_id not in self.streams:
+            return
+        message = orjson.loads(data)
+        await self._fan_out(poll_id, message["seq"], message["votes"])
+
+    async def refresh(self, poll_id: str, current: PollVotesInDB):
+        """
+        Bring this worker's clients of a poll up to freshly read counts, if they are newer.
+        For updates published before the poll's stream existed, which no broadcast delivered.
+        """
+
+        await self._fan_out(poll_id, current.seq, current.votes)
+
+    async def _fan_out(self, poll_id: str, seq: int, votes: Dict[str, int]):
+        stream = self.streams.get(poll_id)
+        if stream is None:
+            return
+
+        # A chunked fan-out yields to the event loop, so broadcasts of one poll must not
+        # interleave, or clients could get deltas out of order
+        async with stream.fanout_lock:
+            started = time.perf_counter()
+
+            prev = stream.seq
+            changed = stream.advance(seq, votes)
+            if changed is None:
+                # Already sent, or older than what was sent
+                return
+
+            # Encode once and queue the same text frame for every client
+            text = delta_frame(stream.seq, prev, changed)
+
+            # Iterate over a copy since evictions and new clients modify the registry.
+            # Clients that connect meanwhile already got the new counts in their snapshot
+            clients = list(self.active_connections.get(poll_id, {}).values())
+            chunk_size = settings.WS_FANOUT_CHUNK_SIZE
+            for start in range(0, len(clients), chunk_size):
+                if start:
+                    # Let other tasks run between chunks of a very large poll
+                    await asyncio.sleep(0)
+                for client in clients[start : start + chunk_size]:
+                    self._enqueue(poll_id, client, text, stream)
+
+            broadcast_duration.observe(time.perf_counter() - started)
+            broadcast_fanout.observe(len(clients))
+
+    def _enqueue(self, poll_id: str, client: ClientConnection, text: str, stream: PollStream):
+        """Queue a frame without ever blocking, replacing the backlog of slow clients."""
+
+        if client.queue.full():
+            # Deltas only apply in order, so the whole backlog is replaced by a snapshot
+            while not client.queue.empty():
+                client.queue.get_nowait()
+            text = stream.snapshot()
+            client.dropped_updates += 1
+
+            if client.dropped_updates > settings.WS_MAX_DROPPED_UPDATES:
+                self._evict(poll_id, client)
+                return
+        else:
+            client.dropped_updates = 0
+
+        client.queue.put_nowait(text)
+
+    def _evict(self, poll_id: str, client: ClientConnection):
+        """Disconnect a client that stayed behind for too long."""
+
+        self._remove(poll_id, client)
+        self.evicted_slow_consumers += 1
+        logger.warning(f"Evicted slow WebSocket client from poll '{poll_id}'")
+
+        # Closing may itself stall on a slow socket, so don't wait for it here
+        task = asyncio.create_task(self._close(client.websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(
+                websocket.close(
+                    code=status.WS_1013_TRY_AGAIN_LATER, reason="Client too slow"
+                ),
+                timeout=settings.WS_SEND_TIMEOUT_SECONDS,
+            )
+        except Exception:
+            pass
+
+    async def _write(self, poll_id: str, client: ClientConnection):
+        """Send queued frames to a single client until it goes away."""
+
+        try:
+            while True:
+                text = await client.queue.get()
+                await asyncio.wait_for(
+                    client.websocket.send_text(text),
+                    timeout=settings.WS_SEND_TIMEOUT_SECONDS,
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # A dead or stalled socket only affects its own client
+            logger.info(f"Dropping unresponsive WebSocket client from poll '{poll_id}'")
+            self._remove(poll_id, client)
+
+    def connection_count(self) -> int:
+        return self._count
+
+    def hot_polls(self, limit: int) -> List[tuple[str, int]]:
+        """The polls with the most clients connected to this worker, busiest first."""
+
+        return heapq.nlargest(
+            limit,
+            ((poll_id, len(clients)) for poll_id, clients in self.active_connections.items()),
+            key=lambda item: item[1],
+        )
 
 
 # Global ConnectionManager instance
 manager = ConnectionManager()
+
+registry.register(
+    CallbackMetric(
+        "websocket_connections",
+        "WebSocket clients connected to this worker.",
+        lambda: [((), manager.connection_count())],
+    )
+)
+registry.register(
+    CallbackMetric(
+        "websocket_poll_connections",
+        "WebSocket clients connected to this worker, for the busiest polls.",
+        lambda: [
+            ((poll_id,), count)
+            for poll_id, count in manager.hot_polls(settings.METRICS_HOT_POLLS)
+        ],
+        labelnames=("poll_id",),
+    )
+)
+registry.register(
+    CallbackMetric(
+        "websocket_rejected_connections_total",
+        "Live results connections refused for being over a connection limit.",
+        lambda: [((), manager.rejected_connections)],
+        kind="counter",
+    )
+)
+registry.register(
+    CallbackMetric(
+        "websocket_evicted_slow_consumers_total",
+        "WebSocket clients disconnected for falling behind.",
+        lambda: [((), manager.evicted_slow_consumers)],
+        kind="counter",
+    )
+)
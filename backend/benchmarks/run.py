@@ -0,0 +1,264 @@
+"""
+Load and latency benchmarks for the API's hot paths.
+
+Drives the ASGI app in-process (no HTTP server) against a local MongoDB, with
+Turnstile verification stubbed out. Run from the backend directory with:
+
+    python -m benchmarks.run --mongo-url mongodb://localhost:27017
+
+Each run uses a new database named `bench_<random hex>`, and only that database
+is dropped afterwards. Results are written as JSON (see --output) so runs on
+different commits can be compared.
+"""
+
+import argparse
+import asyncio
+import os
+import platform
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import urlsplit, urlunsplit
+
+import orjson
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--mongo-url",
+        default="mongodb://localhost:27017",
+        help="Connection string of the server, any database name in it is replaced",
+    )
+    parser.add_argument("--output", default="bench_report.json")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--polls", type=int, default=500, help="Polls to create")
+    parser.add_argument("--votes", type=int, default=5000, help="Votes to cast")
+    parser.add_argument("--reads", type=int, default=5000, help="GET /results calls")
+    parser.add_argument("--ws-clients", type=int, default=5000)
+    parser.add_argument("--broadcasts", type=int, default=50)
+    parser.add_argument(
+        "--delivery-timeout",
+        type=float,
+        default=30,
+        help="Seconds to wait for a broadcast to reach every viewer before failing",
+    )
+    return parser.parse_args()
+
+
+def summarize(latencies: list[float], elapsed: float) -> dict:
+    """Throughput and latency percentiles (in milliseconds) for one benchmark."""
+
+    ordered = sorted(latencies)
+
+    def percentile(p: float) -> float:
+        index = min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1)))
+        return round(ordered[index] * 1000, 3)
+
+    return {
+        "count": len(ordered),
+        "seconds": round(elapsed, 3),
+        "throughput_per_second": round(len(ordered) / elapsed, 1) if elapsed else None,
+        "p50_ms": percentile(50),
+        "p99_ms": percentile(99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+async def run_concurrently(count: int, concurrency: int, request) -> dict:
+    """Call `request(i)` `count` times with bounded concurrency, timing each call."""
+
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            await request(i)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(timed(i) for i in range(count)))
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def poll_payload(i: int) -> dict:
+    return {
+        "question": f"Benchmark question {i}?",
+        "options": ["Option A", "Option B", "Option C", "Option D"],
+        "turnstile_token": "bench",
+        "duration_hours": 1,
+    }
+
+
+async def bench_poll_creation(client, args) -> dict:
+    async def create(i: int):
+        response = await client.post("/api/polls", json=poll_payload(i))
+        assert response.status_code == 201, response.text
+
+    return await run_concurrently(args.polls, args.concurrency, create)
+
+
+async def bench_votes(client, args, poll: dict) -> dict:
+    option_ids = [option["id"] for option in poll["options"]]
+
+    async def vote(i: int):
+        response = await client.post(
+            f"/api/polls/{poll['poll_id']}/vote",
+            json={
+                "option_ids": [option_ids[i % len(option_ids)]],
+                "voter_fingerprint": uuid.uuid4().hex,
+                "turnstile_token": "bench",
+            },
+        )
+        assert response.status_code == 200, response.text
+
+    return await run_concurrently(args.votes, args.concurrency, vote)
+
+
+async def bench_results_reads(client, args, poll: dict) -> dict:
+    async def read(i: int):
+        response = await client.get(f"/api/polls/{poll['poll_id']}/results")
+        assert response.status_code == 200, response.text
+
+    return await run_concurrently(args.reads, args.concurrency, read)
+
+
+class SimulatedViewer:
+    """In-memory WebSocket client that records when each delta reaches it."""
+
+    def __init__(self, on_receipt):
+        self.on_receipt = on_receipt
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        message = orjson.loads(data)
+        if message["type"] == "delta":
+            self.on_receipt(message["seq"])
+
+    async def close(self, code: int = 1000, reason: str | None = None):
+        pass
+
+
+async def bench_broadcast_fanout(manager, args) -> dict:
+    """Time from `broadcast_raw` until every simulated viewer has received the frame."""
+
+    poll_id = "bench-fanout"
+    latencies = []
+    sent_at = {}
+    delivered = asyncio.Event()
+    expected = args.ws_clients
+
+    def on_receipt(seq: int):
+        latencies.append(time.perf_counter() - sent_at[seq])
+        if len(latencies) % expected == 0:
+            delivered.set()
+
+    viewers = [SimulatedViewer(on_receipt) for _ in range(args.ws_clients)]
+    for viewer in viewers:
+        await manager.connect(poll_id, viewer)
+    # Let every viewer receive its initial snapshot first
+    await asyncio.sleep(0.1)
+
+    started = time.perf_counter()
+    for seq in range(1, args.broadcasts + 1):
+        delivered.clear()
+        sent_at[seq] = time.perf_counter()
+        frame = orjson.dumps({"seq": seq, "votes": {"a": seq, "b": 0}})
+        await manager.broadcast_raw(poll_id, frame)
+        try:
+            await asyncio.wait_for(delivered.wait(), timeout=args.delivery_timeout)
+        except asyncio.TimeoutError:
+            raise RuntimeError(
+                f"Broadcast {seq} reached {len(latencies) - (seq - 1) * expected} of {expected} viewers "
+                f"within {args.delivery_timeout}s"
+            )
+    elapsed = time.perf_counter() - started
+
+    for viewer in viewers:
+        manager.disconnect(poll_id, viewer)
+
+    report = summarize(latencies, elapsed)
+    report["clients"] = args.ws_clients
+    report["broadcasts"] = args.broadcasts
+    return report
+
+
+def current_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def throwaway_database_url(mongo_url: str) -> tuple[str, str]:
+    """The connection string pointed at a new, uniquely named database, and that name."""
+
+    name = f"bench_{uuid.uuid4().hex}"
+    parts = urlsplit(mongo_url)
+    return urlunsplit(parts._replace(path=f"/{name}")), name
+
+
+async def main():
+    args = parse_args()
+    database_url, database_name = throwaway_database_url(args.mongo_url)
+
+    # Settings are read at import time, so configure the app before importing it
+    os.environ["MONGO_CONNECTION_STRING"] = database_url
+    os.environ["TURNSTILE_BACKEND"] = "stub"
+    # All requests come from one address, which is exactly what the rate limits stop
+    os.environ["RATE_LIMIT_ENABLED"] = "False"
+    os.environ.setdefault("CLOUDFLARE_TURNSTILE_SECRET_KEY", "bench")
+
+    from httpx import ASGITransport, AsyncClient
+
+    from app.database import mongodb
+    from app.main import app
+    from app.websocket_manager import manager
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            try:
+                results["poll_creation"] = await bench_poll_creation(client, args)
+
+                response = await client.post("/api/polls", json=poll_payload(-1))
+                poll_id = response.json()["poll_id"]
+                poll = (await client.get(f"/api/polls/{poll_id}")).json()
+
+                results["votes"] = await bench_votes(client, args, poll)
+                results["results_reads"] = await bench_results_reads(client, args, poll)
+                results["broadcast_fanout"] = await bench_broadcast_fanout(manager, args)
+            finally:
+                # Never anything but the database created for this run
+                if mongodb.db.name == database_name:
+                    await mongodb.client.drop_database(database_name)
+
+    report = {
+        "commit": current_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "parameters": {k: v for k, v in vars(args).items() if k not in ("mongo_url", "output")},
+        "results": results,
+    }
+    with open(args.output, "wb") as f:
+        f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+
+    for name, result in results.items():
+        print(
+            f"{name:>18}: {result['throughput_per_second']:>10} /s   "
+            f"p50 {result['p50_ms']:>8} ms   p99 {result['p99_ms']:>8} ms"
+        )
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+"""
+CPU micro-benchmark for encoding poll responses, without MongoDB or HTTP.
+
+Compares the response model path (validate into `PollResults`, serialize it and
+render a `JSONResponse`) with the pre-encoded orjson path used by the GET endpoints:
+
+    python -m benchmarks.serialization
+"""
+
+import argparse
+import timeit
+import uuid
+from datetime import datetime
+
+from fastapi.responses import JSONResponse
+
+from app.models import PollMetadata, PollPublic, PollResults, PollVotesInDB
+from app.serialization import JSONBytesResponse, encode_poll_public, encode_poll_results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--options", type=int, default=4, help="Options per poll")
+    return parser.parse_args()
+
+
+def make_documents(option_count: int) -> tuple[dict, dict]:
+    """A metadata document and a votes document, as Mongo returns them."""
+
+    options = [{"id": uuid.uuid4().hex, "text": f"Option {i}"} for i in range(option_count)]
+    metadata = {
+        "poll_id": "brave-blue-otter",
+        "question": "Which option do you like best?",
+        "options": options,
+        "allow_multiple_choices": False,
+        "theme": "default",
+        "active_until": datetime(2030, 1, 2, 3, 4, 5, 678000),
+        "expire_at": datetime(2030, 1, 9, 3, 4, 5, 678000),
+        "public_results": True,
+        "creator_key": uuid.uuid4().hex,
+    }
+    votes = {"poll_id": metadata["poll_id"], "votes": {o["id"]: 1234 for o in options}}
+    return metadata, votes
+
+
+def main():
+    args = parse_args()
+    metadata_document, votes_document = make_documents(args.options)
+    # The metadata is cached in-process, so its validation isn't part of a request
+    poll = PollMetadata.model_validate(metadata_document)
+
+    def public_response_model():
+        content = PollPublic.model_validate(poll.model_dump()).model_dump(mode="json")
+        return JSONResponse(content).body
+
+    def public_fast_path():
+        return JSONBytesResponse(encode_poll_public(poll)).body
+
+    def results_response_model():
+        votes = PollVotesInDB.model_validate(votes_document).votes
+        results = PollResults(**poll.model_dump(), votes=votes)
+        content = PollResults.model_validate(results.model_dump()).model_dump(mode="json")
+        return JSONResponse(content).body
+
+    def results_fast_path():
+        votes = PollVotesInDB.model_construct(**votes_document).votes
+        return JSONBytesResponse(encode_poll_results(poll, votes)).body
+
+    assert public_response_model() == public_fast_path()
+    assert results_response_model() == results_fast_path()
+
+    for name, before, after in (
+        ("GET /polls/{id}", public_response_model, public_fast_path),
+        ("GET /polls/{id}/results", results_response_model, results_fast_path),
+    ):
+        before_us = min(timeit.repeat(before, number=args.iterations, repeat=3)) / args.iterations * 1e6
+        after_us = min(timeit.repeat(after, number=args.iterations, repeat=3)) / args.iterations * 1e6
+        print(
+            f"{name:>24}: response model {before_us:7.2f} us   fast path {after_us:7.2f} us   "
+            f"saved {before_us - after_us:7.2f} us/request ({before_us / after_us:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
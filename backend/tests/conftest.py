@@ -1,5 +1,6 @@
 # backend/tests/conftest.py
 
+import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -7,6 +8,8 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from app.main import app
 from app.config import settings
 from app.database import get_db_dependency
+from app.services.rate_limit import rate_limit_store
+from app.services.security import turnstile_verifier
 
 # This is the correct fixture for creating an async test client.
 @pytest_asyncio.fixture(scope="function")
@@ -14,8 +17,21 @@ async def async_client():
     """Provides a client that talks to the app through an ASGI transport."""
     # The transport allows httpx to call our app directly without a running server.
     transport = ASGITransport(app=app)
-    async with AsyncClient(transport=transport, base_url="http://test") as client:
-        yield client
+    # The transport doesn't run the lifespan, and each test has its own event loop,
+    # so the Turnstile client must not keep connections from a previous test's loop
+    await turnstile_verifier.start()
+    try:
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            yield client
+    finally:
+        await turnstile_verifier.close()
+
+# Every test client connects from the same address, so start each test with fresh rate limits.
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    rate_limit_store.clear()
+    yield
+
 
 # This fixture handles the database setup and dependency override.
 @pytest_asyncio.fixture(scope="function")
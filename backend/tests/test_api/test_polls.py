@@ -2,6 +2,9 @@ import pytest
 from httpx import AsyncClient
 from motor.motor_asyncio import AsyncIOMotorDatabase
 import uuid
+import orjson
+
+from app.services.vote_history import vote_history_recorder
 
 # Mark all tests in this file as async
 pytestmark = pytest.mark.asyncio
@@ -124,6 +127,51 @@ async def test_vote_duplicate_fingerprint_fails(
     assert second_response.status_code == 409  # 409 Conflict
 
 
+async def test_vote_can_be_retried_after_failing_to_count(
+    async_client: AsyncClient, test_db: AsyncIOMotorDatabase, monkeypatch
+):
+    """Tests that a vote whose count update failed doesn't keep its fingerprint reserved."""
+    created_poll = await create_test_poll(async_client)
+    poll_id = created_poll["poll_id"]
+
+    poll_in_db = await test_db.polls.find_one({"poll_id": poll_id})
+    vote_data = {
+        "option_ids": [poll_in_db["options"][0]["id"]],
+        "voter_fingerprint": uuid.uuid4().hex,
+        "turnstile_token": "test_token",
+    }
+
+    async def failing_update(*args):
+        raise TimeoutError("update timed out")
+
+    with monkeypatch.context() as patch:
+        patch.setattr("app.services.poll_voting._apply_vote_atomically", failing_update)
+        with pytest.raises(TimeoutError):
+            await async_client.post(f"/api/polls/{poll_id}/vote", json=vote_data)
+
+    response = await async_client.post(f"/api/polls/{poll_id}/vote", json=vote_data)
+    assert response.status_code == 200
+
+
+async def test_get_poll_supports_conditional_requests(
+    async_client: AsyncClient, test_db: AsyncIOMotorDatabase
+):
+    """Tests that poll data carries an ETag and that a matching If-None-Match gets a 304."""
+    poll_id = (await create_test_poll(async_client))["poll_id"]
+
+    response = await async_client.get(f"/api/polls/{poll_id}")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"].startswith("public, max-age=")
+
+    cached = await async_client.get(
+        f"/api/polls/{poll_id}", headers={"If-None-Match": etag}
+    )
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+
+
 async def test_get_private_results_fails_without_key(
     async_client: AsyncClient, test_db: AsyncIOMotorDatabase
 ):
@@ -199,3 +247,233 @@ async def test_delete_poll_succeeds_with_key(
     # Check that the poll is now gone from the database
     poll_in_db = await test_db.polls.find_one({"poll_id": poll_id})
     assert poll_in_db is None
+
+
+async def test_vote_stores_voter_outside_poll_document(
+    async_client: AsyncClient, test_db: AsyncIOMotorDatabase
+):
+    """Tests that voter fingerprints are kept in the indexed voter store, not in the poll."""
+
+    created_poll = await create_test_poll(async_client)
+    poll_id = created_poll["poll_id"]
+
+    poll_in_db = await test_db.polls.find_one({"poll_id": poll_id})
+    voter_fingerprint = uuid.uuid4().hex
+    vote_data = {
+        "option_ids": [poll_in_db["options"][0]["id"]],
+        "voter_fingerprint": voter_fingerprint,
+        "turnstile_token": "test_token",
+    }
+    response = await async_client.post(f"/api/polls/{poll_id}/vote", json=vote_data)
+    assert response.status_code == 200
+
+    # The poll document no longer grows with every voter
+    updated_poll = await test_db.polls.find_one({"poll_id": poll_id})
+    assert "voters" not in updated_poll
+
+    # The fingerprint is stored as 16 raw bytes
+    voter = await test_db.poll_voters.find_one({"poll_id": poll_id})
+    assert voter["fp"] == bytes.fromhex(voter_fingerprint)
+
+
+async def test_vote_batch_reports_status_per_entry(
+    async_client: AsyncClient, test_db: AsyncIOMotorDatabase
+):
+    """Tests that a vote batch applies valid entries and reports rejected ones individually."""
+
+    created_poll = await create_test_poll(async_client)
+    poll_id = created_poll["poll_id"]
+
+    poll_in_db = await test_db.polls.find_one({"poll_id": poll_id})
+    option_id = poll_in_db["options"][0]["id"]
+    repeated_fingerprint = uuid.uuid4().hex
+
+    batch_data = {
+        "turnstile_token": "test_token",
+        "votes": [
+            {"option_ids": [option_id], "voter_fingerprint": repeated_fingerprint},
+            {"option_ids": [option_id], "voter_fingerprint": uuid.uuid4().hex},
+            {"option_ids": ["not-an-option"], "voter_fingerprint": uuid.uuid4().hex},
+            {"option_ids": [option_id], "voter_fingerprint": repeated_fingerprint},
+        ],
+    }
+    # Only the poll's creator or an integrator may submit batches
+    response = await async_client.post(
+        f"/api/polls/{poll_id}/votes/batch", json=batch_data
+    )
+    assert response.status_code == 403
+
+    # Headers are decoded as latin-1, so a key may contain non-ASCII characters
+    response = await async_client.post(
+        f"/api/polls/{poll_id}/votes/batch",
+        json=batch_data,
+        headers={"X-Creator-Key": "clé".encode("latin-1")},
+    )
+    assert response.status_code == 403
+
+    response = await async_client.post(
+        f"/api/polls/{poll_id}/votes/batch",
+        json=batch_data,
+        headers={"X-Creator-Key": created_poll["creator_key"]},
+    )
+
+    assert response.status_code == 200
+    response_json = response.json()
+    assert response_json["accepted"] == 2
+    assert [result["status"] for result in response_json["results"]] == [
+        "accepted",
+        "accepted",
+        "invalid_options",
+        "already_voted",
+    ]
+
+    # Both accepted votes were applied in one go
+    updated_poll = await test_db.polls.find_one({"poll_id": poll_id})
+    assert updated_poll["votes"][option_id] == 2
+
+
+async def test_list_creator_polls_pages_newest_first(
+    async_client: AsyncClient, test_db: AsyncIOMotorDatabase
+):
+    """Tests that polls created with one creator key are listed in pages, with vote totals."""
+
+    creator_key = uuid.uuid4().hex
+    poll_ids = []
+    for question in ("First", "Second", "Third"):
+        response = await async_client.post(
+            "/api/polls",
+            json={"question": question, "options": ["A", "B"], "turnstile_token": "test_token"},
+            headers={"X-Creator-Key": creator_key},
+        )
+        assert response.status_code == 201
+        assert response.json()["creator_key"] == creator_key
+        poll_ids.append(response.json()["poll_id"])
+
+    # Another creator's poll is never listed
+    await create_test_poll(async_client)
+
+    poll_in_db = await test_db.polls.find_one({"poll_id": poll_ids[0]})
+    await async_client.post(
+        f"/api/polls/{poll_ids[0]}/vote",
+        json={
+            "option_ids": [poll_in_db["options"][0]["id"]],
+            "turnstile_token": "test_token",
+            "voter_fingerprint": uuid.uuid4().hex,
+        },
+    )
+
+    headers = {"X-Creator-Key": creator_key}
+    first_page = await async_client.get("/api/polls?limit=2", headers=headers)
+    assert first_page.status_code == 200
+    first_page_json = first_page.json()
+    assert len(first_page_json["polls"]) == 2
+    assert first_page_json["next_cursor"]
+
+    second_page = await async_client.get(
+        "/api/polls",
+        params={"limit": 2, "cursor": first_page_json["next_cursor"]},
+        headers=headers,
+    )
+    second_page_json = second_page.json()
+    assert second_page_json["next_cursor"] is None
+
+    # Polls created within the same millisecond may come in any order, but never twice
+    listed = first_page_json["polls"] + second_page_json["polls"]
+    assert sorted(poll["poll_id"] for poll in listed) == sorted(poll_ids)
+    assert [poll["created_at"] for poll in listed] == sorted(
+        (poll["created_at"] for poll in listed), reverse=True
+    )
+    totals = {poll["poll_id"]: poll["total_votes"] for poll in listed}
+    assert totals == {poll_ids[0]: 1, poll_ids[1]: 0, poll_ids[2]: 0}
+    assert "voters" not in listed[0] and "options" not in listed[0]
+
+    invalid = await async_client.get("/api/polls?cursor=nope", headers=headers)
+    assert invalid.status_code == 400
+
+
+async def test_vote_history_counts_votes_per_bucket(
+    async_client: AsyncClient, test_db: AsyncIOMotorDatabase
+):
+    """Tests that votes are counted in time buckets that the history endpoint returns."""
+
+    created_poll = await create_test_poll(async_client)
+    poll_id = created_poll["poll_id"]
+
+    poll_in_db = await test_db.polls.find_one({"poll_id": poll_id})
+    option_id = poll_in_db["options"][0]["id"]
+    for _ in range(2):
+        response = await async_client.post(
+            f"/api/polls/{poll_id}/vote",
+            json={
+                "option_ids": [option_id],
+                "turnstile_token": "test_token",
+                "voter_fingerprint": uuid.uuid4().hex,
+            },
+        )
+        assert response.status_code == 200
+
+    # Buckets are written in the background
+    await vote_history_recorder.flush(test_db)
+    response = await async_client.get(f"/api/polls/{poll_id}/results/history")
+
+    assert response.status_code == 200
+    history = response.json()
+    assert history["bucket_seconds"] == 60
+    assert history["next_start"] is None
+    # Both votes may straddle a minute boundary
+    assert sum(bucket["votes"].get(option_id, 0) for bucket in history["buckets"]) == 2
+    assert all(bucket["start"].endswith("Z") for bucket in history["buckets"])
+
+    # A range that ends before the votes has no buckets
+    response = await async_client.get(
+        f"/api/polls/{poll_id}/results/history", params={"end": "2000-01-01T00:00:00Z"}
+    )
+    assert response.json()["buckets"] == []
+
+
+async def test_export_streams_results_for_the_creator_only(
+    async_client: AsyncClient, test_db: AsyncIOMotorDatabase
+):
+    """Tests that a results export needs the creator key and lists totals and buckets."""
+
+    created_poll = await create_test_poll(async_client, options=["Red", "Blue"])
+    poll_id = created_poll["poll_id"]
+
+    poll_in_db = await test_db.polls.find_one({"poll_id": poll_id})
+    red, blue = (option["id"] for option in poll_in_db["options"])
+    await async_client.post(
+        f"/api/polls/{poll_id}/vote",
+        json={
+            "option_ids": [red],
+            "turnstile_token": "test_token",
+            "voter_fingerprint": uuid.uuid4().hex,
+        },
+    )
+    await vote_history_recorder.flush(test_db)
+
+    # Public results don't make the export public
+    response = await async_client.get(f"/api/polls/{poll_id}/export")
+    assert response.status_code == 422
+    response = await async_client.get(
+        f"/api/polls/{poll_id}/export", headers={"X-Creator-Key": "wrong-key"}
+    )
+    assert response.status_code == 403
+
+    headers = {"X-Creator-Key": created_poll["creator_key"]}
+    response = await async_client.get(f"/api/polls/{poll_id}/export", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.splitlines()
+    assert lines[:3] == [
+        "type,start,option_id,option,votes",
+        f"total,,{red},Red,1",
+        f"total,,{blue},Blue,0",
+    ]
+    assert lines[3].startswith("bucket,") and lines[3].endswith(f",{red},Red,1")
+
+    response = await async_client.get(
+        f"/api/polls/{poll_id}/export", params={"format": "ndjson"}, headers=headers
+    )
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [orjson.loads(line) for line in response.text.splitlines()]
+    assert [row["type"] for row in rows] == ["total", "total", "bucket", "bucket"]
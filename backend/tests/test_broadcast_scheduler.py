@@ -0,0 +1,29 @@
+import pytest
+
+from app.broadcast_scheduler import BroadcastScheduler
+from app.models import PollVotesInDB
+
+# Mark all tests in this file as async
+pytestmark = pytest.mark.asyncio
+
+
+async def test_failed_broadcasts_are_retried_on_the_next_flush(monkeypatch):
+    """Tests that polls whose broadcast failed stay dirty instead of going stale."""
+    sent = []
+
+    async def broadcast(poll_id, message):
+        if poll_id == "failing":
+            raise ConnectionError("backplane unavailable")
+        sent.append((poll_id, message))
+
+    monkeypatch.setattr("app.broadcast_scheduler.manager.broadcast", broadcast)
+    scheduler = BroadcastScheduler()
+    scheduler.mark_dirty("sent", PollVotesInDB(poll_id="sent", seq=1, votes={"x": 1}))
+    scheduler.mark_dirty("failing", PollVotesInDB(poll_id="failing", seq=4, votes={"y": 2}))
+
+    with pytest.raises(ConnectionError):
+        await scheduler.flush()
+
+    assert sent == [("sent", {"seq": 1, "votes": {"x": 1}})]
+    assert list(scheduler._dirty) == ["failing"]
+    assert scheduler._dirty["failing"].seq == 4
@@ -0,0 +1,28 @@
+from app.cache import LRUTTLCache
+
+
+def test_least_recently_used_entry_is_evicted():
+    """Tests that the cache stays bounded and drops the entry used longest ago."""
+    cache = LRUTTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now the least recently used
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_stale_entries_count_as_misses(monkeypatch):
+    """Tests that entries past their TTL are dropped and counted as misses."""
+    now = 1000.0
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: now)
+    cache = LRUTTLCache(maxsize=10, ttl=5)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    now += 5
+    assert cache.get("a") is None
+    assert cache.stats() == {"size": 0, "hits": 1, "misses": 1}
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+
+from fastapi import APIRouter, FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.metrics import Counter, Histogram, HTTPMetricsMiddleware, Registry, http_requests
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Tests that observations are rendered as cumulative buckets with a sum and count."""
+    registry = Registry()
+    histogram = registry.register(
+        Histogram("op_seconds", "Operation latency.", ("op",), buckets=(0.1, 1))
+    )
+    histogram.observe(0.05, "read")
+    histogram.observe(0.5, "read")
+    histogram.observe(3, "read")
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE op_seconds histogram" in lines
+    assert 'op_seconds_bucket{op="read",le="0.1"} 1' in lines
+    assert 'op_seconds_bucket{op="read",le="1"} 2' in lines
+    assert 'op_seconds_bucket{op="read",le="+Inf"} 3' in lines
+    assert 'op_seconds_sum{op="read"} 3.55' in lines
+    assert 'op_seconds_count{op="read"} 3' in lines
+
+
+def test_counter_escapes_label_values():
+    """Tests that label values are escaped according to the text format."""
+    counter = Counter("errors_total", "Errors.", ("reason",))
+    counter.inc('bad "token"')
+    counter.inc('bad "token"', amount=2)
+
+    assert counter.render()[-1] == 'errors_total{reason="bad \\"token\\""} 3'
+
+
+
+def test_rendering_while_another_thread_adds_series():
+    """Tests that a scrape copes with series being added from driver threads."""
+    histogram = Histogram("cmd_seconds", "Command latency.", ("command",))
+    thread = threading.Thread(
+        target=lambda: [histogram.observe(0.01, f"command{i}") for i in range(5000)]
+    )
+
+    thread.start()
+    while thread.is_alive():
+        histogram.render()
+    thread.join()
+
+    assert len(histogram.render()) == 2 + 5000 * (len(histogram.buckets) + 3)
+
+
+def test_request_metrics_use_the_full_route_template():
+    """Tests that requests to an included router are labelled with its prefix."""
+    router = APIRouter()
+
+    @router.get("/items/{item_id}")
+    def read_item(item_id: str):
+        return {}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/v9")
+    app.add_middleware(HTTPMetricsMiddleware)
+
+    async def request():
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            await client.get("/v9/items/1")
+            await client.get("/v9/missing")
+
+    asyncio.run(request())
+
+    lines = http_requests.render()
+    assert 'http_requests_total{method="GET",route="/v9/items/{item_id}",status="200"} 1' in lines
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"} 1' in lines
@@ -0,0 +1,23 @@
+import orjson
+
+from app.services.poll_export import encode_csv, encode_ndjson
+
+ROWS = [
+    {"type": "total", "start": None, "option_id": "a", "option": "Yes, \"really\"", "votes": 3},
+    {"type": "bucket", "start": "2026-03-01T12:34:00Z", "option_id": "b", "option": "=1+1", "votes": 0},
+]
+
+
+def test_csv_rows_are_quoted_and_formulas_escaped():
+    """Tests that CSV rows follow the column order and can't run as spreadsheet formulas."""
+    assert encode_csv(ROWS).decode().splitlines() == [
+        'total,,a,"Yes, ""really""",3',
+        "bucket,2026-03-01T12:34:00Z,b,'=1+1,0",
+    ]
+
+
+def test_ndjson_has_one_object_per_line():
+    """Tests that every NDJSON line is a complete JSON object."""
+    lines = encode_ndjson(ROWS).splitlines()
+
+    assert [orjson.loads(line) for line in lines] == ROWS
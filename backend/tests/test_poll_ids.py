@@ -0,0 +1,56 @@
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from app.exceptions import PollCreationError
+from app.services.poll_ids import PollIdAllocator
+
+# Mark all tests in this file as async
+pytestmark = pytest.mark.asyncio
+
+
+class FakePollsCollection:
+    """Rejects inserts of IDs that are already taken, like the unique poll_id index."""
+
+    def __init__(self, taken_ids):
+        self.taken_ids = set(taken_ids)
+
+    async def insert_one(self, document):
+        if document["poll_id"] in self.taken_ids:
+            raise DuplicateKeyError(
+                "duplicate key", 11000, {"keyPattern": {"poll_id": 1}}
+            )
+        self.taken_ids.add(document["poll_id"])
+
+
+class FakeDatabase:
+    def __init__(self, taken_ids=()):
+        self.polls = FakePollsCollection(taken_ids)
+
+
+# TEST CASES START ===
+
+
+async def test_insert_retries_with_new_id_on_collision():
+    """Tests that a taken candidate ID is replaced and counted as a collision."""
+    allocator = PollIdAllocator(["a", "b"], ["c"], ["d"])
+    # Draw the taken ID once more before a free one, instead of relying on chance
+    candidates = iter(["a-c-d", "b-c-d"])
+    allocator.generate = lambda: next(candidates)
+    db = FakeDatabase(taken_ids={"a-c-d"})
+
+    poll_id = await allocator.insert({"poll_id": "a-c-d"}, db)
+
+    assert poll_id == "b-c-d"
+    assert allocator.collisions == 2
+
+
+async def test_insert_gives_up_after_max_attempts():
+    """Tests that creation fails instead of looping forever once the ID space is full."""
+    allocator = PollIdAllocator(["a"], ["c"], ["d"], max_attempts=3)
+    db = FakeDatabase(taken_ids={"a-c-d"})
+
+    with pytest.raises(PollCreationError):
+        await allocator.insert({"poll_id": "a-c-d"}, db)
+
+    assert allocator.attempts == 3
+    assert allocator.collision_rate == 1.0
@@ -0,0 +1,43 @@
+import pytest
+from fastapi import HTTPException
+
+from app.services.rate_limit import InMemoryRateLimitStore, RateLimit
+
+# Mark all tests in this file as async
+pytestmark = pytest.mark.asyncio
+
+
+async def test_bucket_allows_a_burst_then_refills(monkeypatch):
+    """Tests that a full bucket allows `burst` requests, then one per refill interval."""
+    now = 1000.0
+    monkeypatch.setattr("app.services.rate_limit.time.monotonic", lambda: now)
+    store = InMemoryRateLimitStore(maxsize=10)
+
+    assert [await store.hit("ip", per_second=1, burst=3) for _ in range(3)] == [0, 0, 0]
+    assert await store.hit("ip", per_second=1, burst=3) == pytest.approx(1)
+
+    now += 1
+    assert await store.hit("ip", per_second=1, burst=3) == 0
+    assert await store.hit("other-ip", per_second=1, burst=3) == 0
+
+
+async def test_bucket_storage_is_bounded():
+    """Tests that only the most recently used buckets are kept."""
+    store = InMemoryRateLimitStore(maxsize=2)
+    for key in ("a", "b", "c"):
+        await store.hit(key, per_second=1, burst=1)
+
+    assert list(store._buckets) == ["b", "c"]
+
+
+async def test_limit_rejects_with_retry_after(monkeypatch):
+    """Tests that going over a limit raises a 429 telling the client when to retry."""
+    monkeypatch.setattr("app.services.rate_limit.rate_limit_store", InMemoryRateLimitStore())
+    limit = RateLimit("test", per_minute=6, burst=1)
+    await limit.check("10.0.0.1")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await limit.check("10.0.0.1")
+
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.headers == {"Retry-After": "10"}
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+from fastapi.responses import JSONResponse
+
+from app.models import PollMetadata, PollPublic, PollResults
+from app.serialization import (
+    encode_poll_public,
+    encode_poll_results,
+    etag_matches,
+    poll_cache_headers,
+)
+
+
+def make_poll(**overrides) -> PollMetadata:
+    # Mongo returns naive UTC datetimes with millisecond precision
+    document = {
+        "poll_id": "brave-blue-otter",
+        "question": 'Tabs or "spaces"? \\ été \U0001f600 \x01\n',
+        "options": [
+            {"id": "a" * 32, "text": "Tabs  "},
+            {"id": "b" * 32, "text": "Spaces </script>"},
+        ],
+        "allow_multiple_choices": False,
+        "theme": "default",
+        "active_until": datetime(2030, 1, 2, 3, 4, 5, 678000),
+        "expire_at": datetime(2030, 1, 9, 3, 4, 5),
+        "public_results": True,
+        "creator_key": "secret",
+    }
+    document.update(overrides)
+    return PollMetadata.model_validate(document)
+
+
+def response_model_body(model: type, content: dict) -> bytes:
+    """The body FastAPI produces when an endpoint returns `content` for `response_model`."""
+    return JSONResponse(model.model_validate(content).model_dump(mode="json")).body
+
+
+def test_public_payload_is_byte_identical_to_response_model():
+    """Tests that the fast path encodes polls exactly like the `PollPublic` response model."""
+    for poll in (make_poll(), make_poll(allow_multiple_choices=True, public_results=False)):
+        assert encode_poll_public(poll) == response_model_body(PollPublic, poll.model_dump())
+
+
+def test_results_payload_is_byte_identical_to_response_model():
+    """Tests that the fast path encodes results exactly like the `PollResults` response model."""
+    poll = make_poll()
+    for votes in ({"a" * 32: 3, "b" * 32: 0}, {}):
+        expected = response_model_body(PollResults, {**poll.model_dump(), "votes": votes})
+        assert encode_poll_results(poll, votes) == expected
+
+
+def test_cache_headers_are_bounded_by_expiry():
+    """Tests that polls are cacheable for the configured time, but never past their expiry."""
+    far_away = make_poll(expire_at=datetime.utcnow() + timedelta(days=7))
+    expiring = make_poll(expire_at=datetime.utcnow() + timedelta(seconds=90))
+    expired = make_poll(expire_at=datetime.utcnow() - timedelta(seconds=1))
+
+    assert poll_cache_headers(far_away)["Cache-Control"] == "public, max-age=300"
+    assert poll_cache_headers(expiring)["Cache-Control"] in (
+        "public, max-age=89",
+        "public, max-age=90",
+    )
+    assert poll_cache_headers(expired)["Cache-Control"] == "public, max-age=0"
+
+
+def test_etag_changes_with_content_and_matches_if_none_match():
+    """Tests that ETags are strong, content based and compared like `If-None-Match` requires."""
+    etag = poll_cache_headers(make_poll())["ETag"]
+
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == poll_cache_headers(make_poll())["ETag"]
+    assert etag != poll_cache_headers(make_poll(theme="dark"))["ETag"]
+
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from app.backplane import InProcessBackplane
+from app.models import PollVotesInDB
+from app.sse import EventStreamConnection, parse_event_id
+from app.websocket_manager import ConnectionManager
+
+# Mark all tests in this file as async
+pytestmark = pytest.mark.asyncio
+
+
+async def test_event_stream_receives_snapshot_then_deltas_with_event_ids():
+    """Tests that SSE clients are fed by the manager, with sequence numbers as event IDs."""
+    manager = ConnectionManager(backplane=InProcessBackplane())
+    connection = EventStreamConnection()
+    current = PollVotesInDB(poll_id="poll-a", seq=3, votes={"x": 1})
+    await manager.connect("poll-a", connection, current=current)
+
+    events = connection.events()
+    assert await anext(events) == "retry: 3000\n\n"
+    assert await anext(events) == (
+        'id: 3\nevent: snapshot\ndata: {"type":"snapshot","seq":3,"votes":{"x":1}}\n\n'
+    )
+
+    await manager.broadcast("poll-a", {"seq": 4, "votes": {"x": 2}})
+    assert await asyncio.wait_for(anext(events), timeout=1) == (
+        'id: 4\nevent: delta\ndata: {"type":"delta","seq":4,"prev":3,"votes":{"x":2}}\n\n'
+    )
+
+
+async def test_closing_ends_the_event_stream():
+    """Tests that a client closed by the manager ends its response."""
+    connection = EventStreamConnection()
+    events = connection.events()
+    await anext(events)
+
+    await connection.close()
+
+    with pytest.raises(StopAsyncIteration):
+        await anext(events)
+
+
+async def test_only_numeric_event_ids_resume_a_stream():
+    """Tests that a foreign `Last-Event-ID` falls back to a snapshot instead of failing."""
+    assert parse_event_id("42") == 42
+    assert parse_event_id("not-a-seq") is None
+    assert parse_event_id(None) is None
@@ -0,0 +1,107 @@
+from datetime import datetime, timezone
+
+import pytest
+from pymongo import UpdateOne
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from app.exceptions import VoteBufferFullError
+from app.services.vote_buffer import VoteBuffer
+
+# Mark all tests in this file as async
+pytestmark = pytest.mark.asyncio
+
+EXPIRE_AT = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+
+class FakeCollection:
+    """Records bulk writes, failing the operations at `failing_indexes`."""
+
+    def __init__(self, failing_indexes=()):
+        self.failing_indexes = failing_indexes
+        self.writes = []
+
+    async def bulk_write(self, operations, ordered=True):
+        self.writes.append(operations)
+        if self.failing_indexes:
+            raise BulkWriteError(
+                {
+                    "writeErrors": [
+                        {"index": i, "code": 2, "errmsg": "failed"} for i in self.failing_indexes
+                    ]
+                }
+            )
+
+
+class FakeVoterCollection:
+    """Enforces unique fingerprints, and can lose the reply to an insert that was applied."""
+
+    def __init__(self):
+        self.fingerprints = set()
+        self.lose_reply = False
+
+    async def insert_many(self, records, ordered=True):
+        errors = []
+        for i, record in enumerate(records):
+            key = (record["poll_id"], record["fp"])
+            if key in self.fingerprints:
+                errors.append({"index": i, "code": 11000, "errmsg": "duplicate key"})
+            self.fingerprints.add(key)
+        if self.lose_reply:
+            raise AutoReconnect("connection closed")
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+
+class FakeDatabase:
+    def __init__(self, failing_indexes=()):
+        self.polls = FakeCollection(failing_indexes)
+        self.poll_voters = FakeVoterCollection()
+
+
+async def test_partial_bulk_write_only_retries_failed_polls(monkeypatch):
+    """Tests that counts applied before a bulk write error aren't applied a second time."""
+    db = FakeDatabase(failing_indexes=[1])
+    monkeypatch.setattr("app.services.vote_buffer.get_database", lambda: db)
+    buffer = VoteBuffer()
+    buffer._unapplied = {"applied": {"a": 2}, "failed": {"b": 3}}
+    buffer._expire_at = {"applied": EXPIRE_AT, "failed": EXPIRE_AT}
+
+    await buffer.flush()
+
+    assert buffer._unapplied == {"failed": {"b": 3}}
+
+    db.polls.failing_indexes = ()
+    await buffer.flush()
+
+    assert db.polls.writes[-1] == [
+        UpdateOne({"poll_id": "failed"}, {"$inc": {"votes.b": 3, "seq": 1}})
+    ]
+    assert buffer._unapplied == {}
+
+
+async def test_votes_stored_before_a_lost_reply_are_still_counted(monkeypatch):
+    """Tests that a retried insert finding its own earlier write counts the votes."""
+    db = FakeDatabase()
+    monkeypatch.setattr("app.services.vote_buffer.get_database", lambda: db)
+    buffer = VoteBuffer()
+    buffer.add("poll", "a" * 32, {"opt"}, EXPIRE_AT)
+
+    db.poll_voters.lose_reply = True
+    with pytest.raises(AutoReconnect):
+        await buffer.flush()
+
+    db.poll_voters.lose_reply = False
+    await buffer.flush()
+
+    assert db.polls.writes[-1] == [
+        UpdateOne({"poll_id": "poll"}, {"$inc": {"votes.opt": 1, "seq": 1}})
+    ]
+
+
+async def test_add_refuses_votes_once_full():
+    """Tests that the buffer stops growing when its votes aren't getting written."""
+    buffer = VoteBuffer(max_pending=1)
+    buffer.add("poll", "a" * 32, {"opt"}, EXPIRE_AT)
+
+    with pytest.raises(VoteBufferFullError):
+        buffer.add("poll", "b" * 32, {"opt"}, EXPIRE_AT)
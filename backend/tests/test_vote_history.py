@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta, timezone
+
+from pymongo import UpdateOne
+
+from app.services.vote_history import VoteHistoryRecorder, bucket_start, bucket_update
+
+
+def test_bucket_start_rounds_down_to_the_bucket():
+    """Tests that times within a bucket map to its start, naive times being UTC."""
+    at = datetime(2026, 3, 1, 12, 34, 56, 789000, tzinfo=timezone.utc)
+
+    assert bucket_start(at, 60) == datetime(2026, 3, 1, 12, 34, tzinfo=timezone.utc)
+    assert bucket_start(at, 3600) == datetime(2026, 3, 1, 12, tzinfo=timezone.utc)
+    assert bucket_start(at.replace(tzinfo=None), 60) == bucket_start(at, 60)
+
+
+def test_bucket_update_upserts_counts_that_expire_with_the_poll():
+    """Tests that a bucket update adds to the option counts of the matching bucket."""
+    at = datetime(2026, 3, 1, 12, 34, 56, tzinfo=timezone.utc)
+    expire_at = at + timedelta(days=7)
+
+    assert bucket_update("poll", {"a": 2, "b": 1}, expire_at, at) == UpdateOne(
+        {"poll_id": "poll", "start": datetime(2026, 3, 1, 12, 34, tzinfo=timezone.utc)},
+        {"$inc": {"votes.a": 2, "votes.b": 1}, "$setOnInsert": {"expire_at": expire_at}},
+        upsert=True,
+    )
+
+
+def test_recorder_combines_votes_per_poll_and_bucket(monkeypatch):
+    """Tests that votes in the same bucket are added up before being written."""
+    now = datetime(2026, 3, 1, 12, 34, 10, tzinfo=timezone.utc)
+    monkeypatch.setattr(
+        "app.services.vote_history.datetime",
+        type("FrozenDatetime", (datetime,), {"now": staticmethod(lambda tz=None: now)}),
+    )
+    recorder = VoteHistoryRecorder()
+    expire_at = now + timedelta(days=7)
+
+    recorder.add("poll", {"a": 1}, expire_at)
+    recorder.add("poll", {"a": 1, "b": 1}, expire_at)
+    recorder.add("other", {"c": 1}, expire_at)
+
+    bucket = datetime(2026, 3, 1, 12, 34, tzinfo=timezone.utc)
+    assert recorder._pending == {("poll", bucket): {"a": 2, "b": 1}, ("other", bucket): {"c": 1}}
@@ -0,0 +1,256 @@
+import asyncio
+
+import orjson
+import pytest
+from pymongo.errors import OperationFailure
+
+from app.backplane import Backplane, InProcessBackplane, MongoChangeStreamBackplane
+from app.exceptions import ConnectionLimitError
+from app.models import PollVotesInDB
+from app.websocket_manager import ConnectionManager
+
+# Mark all tests in this file as async
+pytestmark = pytest.mark.asyncio
+
+
+class FakeWebSocket:
+    """Minimal stand-in for a Starlette WebSocket that records what it was sent."""
+
+    def __init__(self, stalled: bool = False):
+        self.accepted = False
+        self.closed = False
+        self.stalled = stalled  # Never finishes sending, like a client on a dead network
+        self.sent = []
+
+    async def accept(self):
+        self.accepted = True
+
+    async def send_text(self, data):
+        if self.stalled:
+            await asyncio.Event().wait()
+        self.sent.append(orjson.loads(data))
+
+    async def close(self, code: int = 1000, reason: str | None = None):
+        self.closed = True
+
+
+async def let_writers_run():
+    """Give the per-connection writer tasks a chance to drain their queues."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+# TEST CASES START ===
+
+
+async def test_broadcast_reaches_only_clients_of_that_poll():
+    """Tests that a published message is fanned out to the sockets of its own poll only."""
+    manager = ConnectionManager(backplane=InProcessBackplane())
+    listener, other_listener = FakeWebSocket(), FakeWebSocket()
+    await manager.connect("poll-a", listener)
+    await manager.connect("poll-b", other_listener)
+    await let_writers_run()
+
+    await manager.broadcast("poll-a", {"seq": 1, "votes": {"x": 1}})
+    await let_writers_run()
+
+    assert listener.sent == [
+        {"type": "snapshot", "seq": 0, "votes": {}},
+        {"type": "delta", "seq": 1, "prev": 0, "votes": {"x": 1}},
+    ]
+    assert other_listener.sent == [{"type": "snapshot", "seq": 0, "votes": {}}]
+
+
+async def test_disconnect_removes_empty_poll_entry():
+    """Tests that the poll entry is dropped once its last listener disconnects."""
+    manager = ConnectionManager(backplane=InProcessBackplane())
+    listener = FakeWebSocket()
+    await manager.connect("poll-a", listener)
+
+    manager.disconnect("poll-a", listener)
+
+    assert "poll-a" not in manager.active_connections
+
+
+async def test_broadcast_raw_sends_preencoded_frame():
+    """Tests that callers holding encoded bytes can broadcast them as-is."""
+    manager = ConnectionManager(backplane=InProcessBackplane())
+    listener = FakeWebSocket()
+    await manager.connect("poll-a", listener)
+    await let_writers_run()
+
+    await manager.broadcast_raw("poll-a", b'{"seq":1,"votes":{"x":2}}')
+    await let_writers_run()
+
+    assert listener.sent[-1] == {"type": "delta", "seq": 1, "prev": 0, "votes": {"x": 2}}
+
+
+async def test_stalled_client_is_evicted_without_blocking_others(monkeypatch):
+    """Tests that a client which never reads is evicted, while others keep receiving updates."""
+    monkeypatch.setattr("app.websocket_manager.settings.WS_MAX_DROPPED_UPDATES", 3)
+    manager = ConnectionManager(backplane=InProcessBackplane())
+    healthy, stalled = FakeWebSocket(), FakeWebSocket(stalled=True)
+    await manager.connect("poll-a", healthy)
+    await manager.connect("poll-a", stalled)
+
+    for count in range(1, 7):
+        await manager.broadcast("poll-a", {"seq": count, "votes": {"x": count}})
+        await let_writers_run()
+
+    assert healthy.sent[-1] == {"type": "delta", "seq": 6, "prev": 5, "votes": {"x": 6}}
+    assert stalled.closed
+    assert manager.evicted_slow_consumers == 1
+    assert len(manager.active_connections["poll-a"]) == 1
+    # The close task is tracked until it finishes
+    assert not manager._closing
+
+
+async def test_deltas_only_carry_changed_counts_and_skip_stale_snapshots():
+    """Tests that clients get a snapshot on connect, then only changed counts in sequence order."""
+    manager = ConnectionManager(backplane=InProcessBackplane())
+    listener = FakeWebSocket()
+    current = PollVotesInDB(poll_id="poll-a", seq=4, votes={"x": 2, "y": 5})
+    await manager.connect("poll-a", listener, current=current)
+    await let_writers_run()
+
+    await manager.broadcast("poll-a", {"seq": 6, "votes": {"x": 3, "y": 5}})
+    # Published by a vote that finished late, already covered by seq 6
+    await manager.broadcast("poll-a", {"seq": 5, "votes": {"x": 3, "y": 4}})
+    await let_writers_run()
+
+    assert listener.sent == [
+        {"type": "snapshot", "seq": 4, "votes": {"x": 2, "y": 5}},
+        {"type": "delta", "seq": 6, "prev": 4, "votes": {"x": 3}},
+    ]
+
+
+async def test_reconnecting_client_gets_only_what_it_missed(monkeypatch):
+    """Tests that `since` is answered with a merged delta, or a snapshot if it's too old."""
+    monkeypatch.setattr("app.websocket_manager.settings.WS_DELTA_HISTORY", 2)
+    manager = ConnectionManager(backplane=InProcessBackplane())
+    await manager.connect("poll-a", FakeWebSocket())
+    for seq, votes in enumerate(({"x": 1}, {"x": 1, "y": 1}, {"x": 2, "y": 1}), start=1):
+        await manager.broadcast("poll-a", {"seq": seq, "votes": votes})
+
+    up_to_date, recent, stale = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    await manager.connect("poll-a", up_to_date, since=3)
+    await manager.connect("poll-a", recent, since=1)
+    await manager.connect("poll-a", stale, since=0)
+    await let_writers_run()
+
+    assert up_to_date.sent == []
+    assert recent.sent == [{"type": "delta", "seq": 3, "prev": 1, "votes": {"x": 2, "y": 1}}]
+    assert stale.sent == [{"type": "snapshot", "seq": 3, "votes": {"x": 2, "y": 1}}]
+
+
+async def test_connections_over_a_limit_are_refused_before_accepting(monkeypatch):
+    """Tests the per-poll and per-client limits, and that freed slots can be reused."""
+    monkeypatch.setattr("app.websocket_manager.settings.WS_MAX_CONNECTIONS_PER_POLL", 2)
+    monkeypatch.setattr("app.websocket_manager.settings.WS_MAX_CONNECTIONS_PER_CLIENT", 1)
+    manager = ConnectionManager(backplane=InProcessBackplane())
+    first = FakeWebSocket()
+    await manager.connect("poll-a", first, client_key="10.0.0.1")
+    await manager.connect("poll-a", FakeWebSocket(), client_key="10.0.0.2")
+
+    same_client, third_viewer = FakeWebSocket(), FakeWebSocket()
+    with pytest.raises(ConnectionLimitError):
+        await manager.connect("poll-b", same_client, client_key="10.0.0.1")
+    with pytest.raises(ConnectionLimitError):
+        await manager.connect("poll-a", third_viewer, client_key="10.0.0.3")
+
+    assert not same_client.accepted and not third_viewer.accepted
+    assert manager.rejected_connections == 2
+
+    manager.disconnect("poll-a", first)
+    await manager.connect("poll-b", same_client, client_key="10.0.0.1")
+    assert manager.connection_count() == 2
+
+
+async def test_large_fanout_is_chunked_and_reaches_every_client(monkeypatch):
+    """Tests that a broadcast split into chunks still reaches every client exactly once."""
+    monkeypatch.setattr("app.websocket_manager.settings.WS_FANOUT_CHUNK_SIZE", 3)
+    manager = ConnectionManager(backplane=InProcessBackplane())
+    listeners = [FakeWebSocket() for _ in range(10)]
+    for listener in listeners:
+        await manager.connect("poll-a", listener)
+    await let_writers_run()
+
+    await manager.broadcast("poll-a", {"seq": 1, "votes": {"x": 1}})
+    await let_writers_run()
+
+    for listener in listeners:
+        assert listener.sent[1:] == [{"type": "delta", "seq": 1, "prev": 0, "votes": {"x": 1}}]
+
+
+async def test_refresh_delivers_updates_missed_before_the_stream_existed():
+    """Tests that a broadcast dropped before the first client connected is caught up on."""
+    manager = ConnectionManager(backplane=InProcessBackplane())
+    # Published after the endpoint read the counts, but while no stream existed yet
+    await manager.broadcast("poll-a", {"seq": 2, "votes": {"x": 2}})
+
+    listener = FakeWebSocket()
+    await manager.connect(
+        "poll-a", listener, current=PollVotesInDB(poll_id="poll-a", seq=1, votes={"x": 1})
+    )
+    await let_writers_run()
+    await manager.refresh("poll-a", PollVotesInDB(poll_id="poll-a", seq=2, votes={"x": 2}))
+    await let_writers_run()
+
+    assert listener.sent == [
+        {"type": "snapshot", "seq": 1, "votes": {"x": 1}},
+        {"type": "delta", "seq": 2, "prev": 1, "votes": {"x": 2}},
+    ]
+
+
+async def test_incomplete_backplane_fails_when_created():
+    """Tests that a backplane without `publish` can't be instantiated at all."""
+
+    class IncompleteBackplane(Backplane):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteBackplane()
+
+
+class ExpiredResumeCollection:
+    """Change streams that can't resume from a token, like one that fell off the oplog."""
+
+    def __init__(self):
+        self.resumed_from = []
+        self.started = asyncio.Event()
+
+    def watch(self, pipeline, resume_after=None):
+        self.resumed_from.append(resume_after)
+        if resume_after is not None:
+            raise OperationFailure("Resume of change stream was not possible", code=286)
+        self.started.set()
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.Event().wait()
+
+
+async def test_change_stream_restarts_without_a_lost_resume_token(monkeypatch):
+    """Tests that the backplane stops retrying a resume token that is gone for good."""
+    collection = ExpiredResumeCollection()
+    monkeypatch.setattr("app.backplane.get_database", lambda: {"broadcasts": collection})
+    backplane = MongoChangeStreamBackplane()
+    backplane.RETRY_DELAY_SECONDS = 0
+    backplane._resume_token = {"_data": "expired"}
+
+    task = asyncio.create_task(backplane._watch())
+    await asyncio.wait_for(collection.started.wait(), timeout=1)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert collection.resumed_from == [{"_data": "expired"}, None]
@@ -36,11 +36,13 @@ function ResultsPage() {
   const [isLive, setIsLive] = useState(false);
   const ws = useRef(null); // For keeping a single instance of WebSocket across renders
   const reconnectTimer = useRef(null);   // Reconnection timer instance
+  const lastSeq = useRef(null); // Sequence number of the last applied results update
 
   useEffect(() => {
     const fetchResults = async () => {
       setIsLoading(true);
       setError(null); // Clear previous errors
+      lastSeq.current = null; // The results stream starts over with a snapshot
 
       const myPolls = getMyPolls();
       const pollInfo = myPolls.find(p => p.poll_id === pollId);
@@ -80,10 +82,18 @@ function ResultsPage() {
       const useSecureProtocols = import.meta.env.VITE_USE_SECURE_PROTOCOLS === 'true';
       const base = import.meta.env.VITE_API_BASE_URL;
       const wsProtocol = useSecureProtocols ? 'wss://' : 'ws://';
-      let wsUrl = `${wsProtocol}${base}/ws/polls/${pollId}/results`;
-
+      const params = new URLSearchParams();
       if (!poll.public_results && creatorKey) {
-        wsUrl += `?creator_key=${creatorKey}`;
+        params.set('creator_key', creatorKey);
+      }
+      // When reconnecting, only ask for the updates that were missed
+      if (lastSeq.current !== null) {
+        params.set('since', lastSeq.current);
+      }
+
+      let wsUrl = `${wsProtocol}${base}/ws/polls/${pollId}/results`;
+      if (params.toString()) {
+        wsUrl += `?${params}`;
       }
 
       const socket = new WebSocket(wsUrl);
@@ -99,9 +109,23 @@ function ResultsPage() {
         }
       };
       // Update vote data when new data is recieved over WebSocket
+      // A snapshot holds all counts, a delta only the counts that changed since `prev`
       socket.onmessage = (event) => {
         const message = JSON.parse(event.data);
-        setVotes(message.votes);
+        if (lastSeq.current !== null && message.seq <= lastSeq.current) {
+          return; // Already applied
+        }
+
+        if (message.type === 'snapshot') {
+          setVotes(message.votes);
+        } else if (lastSeq.current !== null && message.prev <= lastSeq.current) {
+          setVotes(prevVotes => ({ ...prevVotes, ...message.votes }));
+        } else {
+          // Missed an update, reconnecting catches up from the last applied one
+          socket.close();
+          return;
+        }
+        lastSeq.current = message.seq;
       };
 
       socket.onclose = () => {